@@ -0,0 +1,67 @@
+"""Memoria por producto con el catálogo completo en memoria.
+
+Construye N productos (por defecto 100k SKUs) y mide con tracemalloc los bytes
+asignados por producto, comparando los modelos con __slots__ e historial vacío
+compartido contra una dataclass equivalente con __dict__ y una lista propia por
+producto (el modelo anterior). Los textos se crean antes de medir, así la cifra
+refleja solo el costo de los objetos del modelo.
+
+Uso:
+    python -m benchmarks.model_memory [--products 100000]
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from src.inventory.models import Product
+
+
+@dataclass
+class DictProduct:
+    """Producto como dataclass sin slots, con una lista de historial por instancia."""
+    barcode: str
+    name: str
+    description: Optional[str] = None
+    purchase_price: float = 0.0
+    retail_price: float = 0.0
+    wholesale_price: float = 0.0
+    quantity: int = 0
+    price_history: List = field(default_factory=list)
+    reorder_point: int = 0
+    _history_loader: Optional[object] = field(default=None, init=False, repr=False, compare=False)
+
+
+def _measure(cls, rows) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    catalog = [cls(*row) for row in rows]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del catalog
+    return after - before
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = [(f"{i:013d}", f"Producto {i}", None, 1.0 + i % 7, 1.5 + i % 7, 1.2 + i % 7, i % 50)
+            for i in range(args.products)]
+    result = {"products": args.products}
+    for label, cls in (("slotted", Product), ("dict", DictProduct)):
+        total = _measure(cls, rows)
+        result[f"{label}_bytes_per_product"] = round(total / args.products, 1)
+        result[f"{label}_total_mb"] = round(total / 2**20, 1)
+    result["saving_pct"] = round(100 * (1 - result["slotted_bytes_per_product"] / result["dict_bytes_per_product"]), 1)
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
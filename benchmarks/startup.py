@@ -0,0 +1,105 @@
+"""Benchmark de arranque en frío de la GUI.
+
+Mide, en procesos nuevos, el tiempo de importar src.gui.app y el tiempo hasta el
+primer pintado de la ventana principal con la plataforma Qt "offscreen". También
+informa si algún módulo pesado (pandas, escpos) se cargó durante el arranque.
+
+Uso:
+    python -m benchmarks.startup [--runs 5] [--max-import-ms 800] [--max-paint-ms 1500]
+
+Sale con código 1 si la mediana supera alguno de los límites indicados, para poder
+detectar regresiones en CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ("pandas", "escpos", "numpy")
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import src.gui.app
+elapsed = (time.perf_counter() - start) * 1000
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"import_ms": elapsed, "heavy_modules": heavy}}))
+"""
+
+_PAINT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from PySide6.QtCore import QEvent, QObject, QTimer
+from PySide6.QtWidgets import QApplication
+from src.inventory.services import InventoryRepository, InventoryService
+from src.gui.main_window import MainWindow
+
+class FirstPaint(QObject):
+    def __init__(self):
+        super().__init__()
+        self.ms = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.ms is None:
+            self.ms = (time.perf_counter() - start) * 1000
+            QTimer.singleShot(0, app.quit)
+        return False
+
+app = QApplication(sys.argv)
+service = InventoryService(InventoryRepository({db_path!r}, lazy_history=True), autoload=False)
+window = MainWindow(service)
+probe = FirstPaint()
+window.installEventFilter(probe)
+window.show()
+window.load_catalog()
+QTimer.singleShot(10000, app.quit)
+app.exec()
+window.close()
+print(json.dumps({{"first_paint_ms": probe.ms}}))
+"""
+
+
+def _run_probe(code: str) -> dict:
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--db", default=None, help="Base de datos a abrir (por defecto una vacía temporal)")
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-paint-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.abspath(args.db) if args.db else os.path.join(tmp, "bench.db")
+        imports = [_run_probe(_IMPORT_PROBE.format(heavy=HEAVY_MODULES)) for _ in range(args.runs)]
+        paints = [_run_probe(_PAINT_PROBE.format(db_path=db_path)) for _ in range(args.runs)]
+
+    paint_times = [p["first_paint_ms"] for p in paints if p["first_paint_ms"] is not None]
+    result = {
+        "runs": args.runs,
+        "import_ms_median": statistics.median(r["import_ms"] for r in imports),
+        "first_paint_ms_median": statistics.median(paint_times) if paint_times else None,
+        "heavy_modules_at_startup": sorted({m for r in imports for m in r["heavy_modules"]}),
+    }
+    print(json.dumps(result, indent=2))
+
+    failed = bool(result["heavy_modules_at_startup"])
+    if args.max_import_ms is not None and result["import_ms_median"] > args.max_import_ms:
+        failed = True
+    if args.max_paint_ms is not None and (result["first_paint_ms_median"] is None
+                                          or result["first_paint_ms_median"] > args.max_paint_ms):
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Benchmark de renderizado y transmisión de tickets ESC/POS sin impresora.
+
+Compara enviar el ticket prerenderizado en una sola escritura contra enviarlo
+línea por línea (como hacían las llamadas p.text()/p.set() sueltas), usando un
+archivo temporal y un socket local como impresoras sustitutas. El tiempo por
+socket se detiene cuando el servidor local terminó de recibir todos los bytes,
+no cuando el kernel aceptó la escritura.
+
+Requiere PySide6 instalado: importa src.gui.print_ticket y el paquete src.gui
+carga la interfaz.
+
+Uso:
+    python -m benchmarks.ticket_render [--tickets 1000] [--lines 30]
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from src.gui.print_ticket import FilePrinter, SocketPrinter, render_ticket, send_raw
+
+
+class _SinkServer:
+    """Servidor local que descarta lo recibido, como una impresora de red, y cuenta los bytes."""
+    def __init__(self) -> None:
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.received = 0
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self) -> None:
+        conn, _ = self.server.accept()
+        with conn:
+            while True:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    break
+                self.received += len(chunk)
+
+    def address(self):
+        return self.server.getsockname()
+
+    def wait(self) -> None:
+        """Espera a que el cliente cierre y el servidor haya leído todo."""
+        self.thread.join()
+
+    def close(self) -> None:
+        self.server.close()
+
+
+def _transmit(printer, tickets, single_write: bool, finish) -> tuple:
+    """Envía los tickets y devuelve (ms, bytes enviados); finish() cierra el envío dentro del tiempo."""
+    sent = 0
+    start = time.perf_counter()
+    for data in tickets:
+        if single_write:
+            send_raw(printer, data)
+            sent += len(data)
+        else:
+            for line in data.split(b"\n"):
+                send_raw(printer, line + b"\n")
+                sent += len(line) + 1
+    finish()
+    return (time.perf_counter() - start) * 1000, sent
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=1000)
+    parser.add_argument("--lines", type=int, default=30)
+    args = parser.parse_args()
+
+    lines = [(f"Producto {i}", i % 5 + 1, 1.25, (i % 5 + 1) * 1.25) for i in range(args.lines)]
+    start = time.perf_counter()
+    tickets = [render_ticket(f"cliente-{n}", lines, 100.0) for n in range(args.tickets)]
+    render_ms = (time.perf_counter() - start) * 1000
+
+    result = {
+        "tickets": args.tickets,
+        "lines_per_ticket": args.lines,
+        "bytes_per_ticket": len(tickets[0]),
+        "render_us_per_ticket": render_ms * 1000 / args.tickets,
+        "writes_per_ticket": {"single": 1, "per_line": tickets[0].count(b"\n") + 1},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, single in (("single", True), ("per_line", False)):
+            printer = FilePrinter(os.path.join(tmp, f"{mode}.bin"))
+            result[f"file_{mode}_ms"], _ = _transmit(printer, tickets, single, printer.close)
+    for mode, single in (("single", True), ("per_line", False)):
+        sink = _SinkServer()
+        printer = SocketPrinter(*sink.address())
+
+        def finish() -> None:
+            # Cerrar envía EOF; el reloj sigue hasta que el servidor leyó el último byte
+            printer.close()
+            sink.wait()
+
+        result[f"socket_{mode}_ms"], sent = _transmit(printer, tickets, single, finish)
+        sink.close()
+        if sink.received != sent:
+            print(f"socket {mode}: se enviaron {sent} bytes y se recibieron {sink.received}", file=sys.stderr)
+            return 1
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
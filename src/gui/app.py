@@ -1,14 +1,16 @@
 from PySide6.QtWidgets import QApplication
 import sys
-from src.inventory.services import InventoryService
+from src.inventory.services import InventoryRepository, InventoryService
 from src.gui.main_window import MainWindow
 
 def main() -> None:
     """Punto de entrada para la aplicación GUI de inventario."""
     app = QApplication(sys.argv)
-    inventory_service = InventoryService()
+    # La ventana se muestra de inmediato y el catálogo se carga en segundo plano
+    inventory_service = InventoryService(InventoryRepository(lazy_history=True), autoload=False)
     window = MainWindow(inventory_service)
     window.show()
+    window.load_catalog()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
@@ -0,0 +1,29 @@
+from PySide6.QtCore import QThread, Signal
+from src.inventory.services import InventoryRepository
+
+class CatalogLoader(QThread):
+    """Carga el catálogo por páginas en un hilo de fondo.
+
+    Abre su propia conexión (una conexión SQLite no puede cambiar de hilo) y entrega
+    cada página con page_loaded para mostrar resultados a medida que llegan.
+    """
+    page_loaded = Signal(list)
+    failed = Signal(str)
+
+    def __init__(self, db_path: str, page_size: int = 2000, parent=None) -> None:
+        super().__init__(parent)
+        self.db_path = db_path
+        self.page_size = page_size
+
+    def run(self) -> None:
+        try:
+            repository = InventoryRepository(self.db_path, lazy_history=True)
+            try:
+                for page in repository.iter_product_pages(page_size=self.page_size):
+                    if self.isInterruptionRequested():
+                        break
+                    self.page_loaded.emit(page.products)
+            finally:
+                repository.db.close()
+        except Exception as e:
+            self.failed.emit(str(e))
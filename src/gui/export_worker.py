@@ -0,0 +1,24 @@
+from datetime import datetime
+from PySide6.QtCore import QThread, Signal
+from src.inventory.export import export_summary
+
+class ExportWorker(QThread):
+    """Ejecuta export_summary en un hilo de fondo e informa el avance."""
+    progress = Signal(int)
+    completed = Signal(list)
+    failed = Signal(str)
+
+    def __init__(self, db_path: str, start_date: datetime, end_date: datetime, path: str, parent=None) -> None:
+        super().__init__(parent)
+        self.db_path = db_path
+        self.start_date = start_date
+        self.end_date = end_date
+        self.path = path
+
+    def run(self) -> None:
+        try:
+            paths = export_summary(self.db_path, self.start_date, self.end_date, self.path, self.progress.emit)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.completed.emit(paths)
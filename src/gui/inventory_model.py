@@ -0,0 +1,98 @@
+from typing import Dict, Iterable, List, Optional
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PySide6.QtGui import QColor
+from src.inventory.models import Product
+from src.inventory.services import InventoryService
+
+COLUMNS = [
+    ("Código", "barcode"),
+    ("Nombre", "name"),
+    ("Descripción", "description"),
+    ("Compra", "purchase_price"),
+    ("Venta Detal", "retail_price"),
+    ("Venta Mayor", "wholesale_price"),
+    ("Cantidad", "quantity"),
+    ("Pedido", "reorder_point"),
+]
+QUANTITY_COLUMN = [attr for _, attr in COLUMNS].index("quantity")
+LOW_STOCK_COLOR = QColor(255, 205, 205)
+
+class InventoryTableModel(QAbstractTableModel):
+    """Modelo de tabla respaldado directamente por InventoryService.products.
+
+    No copia datos: la vista pide cada celda visible con data(), así que refrescar
+    cuesta lo que ocupan las filas en pantalla y no el tamaño del catálogo.
+    """
+    def __init__(self, inventory_service: InventoryService, parent=None) -> None:
+        super().__init__(parent)
+        self.inventory_service = inventory_service
+        self._row_count = len(inventory_service.products)
+        self._rows: Dict[str, int] = {}
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        product = self.product_at(index.row())
+        if role == Qt.BackgroundRole:
+            # Resalta la cantidad de los productos en su punto de pedido o por debajo
+            if index.column() == QUANTITY_COLUMN and product.needs_reorder:
+                return LOW_STOCK_COLOR
+            return None
+        if role != Qt.DisplayRole:
+            return None
+        value = getattr(product, COLUMNS[index.column()][1])
+        return "" if value is None else str(value)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section][0]
+        return super().headerData(section, orientation, role)
+
+    def product_at(self, row: int) -> Product:
+        return self.inventory_service.products[row]
+
+    def row_of(self, barcode: str) -> Optional[int]:
+        """Fila de un producto; el índice se construye una vez y luego solo se extiende."""
+        if len(self._rows) != self._row_count:
+            products = self.inventory_service.products
+            for row in range(len(self._rows), self._row_count):
+                self._rows[products[row].barcode] = row
+        return self._rows.get(barcode)
+
+    def sync_rows(self) -> None:
+        """Publica las filas agregadas al final del catálogo desde el último refresco."""
+        count = len(self.inventory_service.products)
+        if count > self._row_count:
+            self.beginInsertRows(QModelIndex(), self._row_count, count - 1)
+            self._row_count = count
+            self.endInsertRows()
+        elif count < self._row_count:
+            self.reset()
+
+    def refresh_rows(self, barcodes: Iterable[str], columns: Optional[List[str]] = None) -> None:
+        """Emite dataChanged solo para las filas (y columnas) indicadas."""
+        self.sync_rows()
+        attrs = [attr for _, attr in COLUMNS]
+        if columns and "reorder_point" in columns:
+            # El resaltado de Cantidad depende del punto de pedido
+            columns = [*columns, "quantity"]
+        cols = [attrs.index(c) for c in columns if c in attrs] if columns else []
+        cols = cols or [0, len(COLUMNS) - 1]
+        first, last = min(cols), max(cols)
+        for barcode in barcodes:
+            row = self.row_of(barcode)
+            if row is not None:
+                self.dataChanged.emit(self.index(row, first), self.index(row, last), [Qt.DisplayRole, Qt.BackgroundRole])
+
+    def reset(self) -> None:
+        """Recarga completa, para cuando el catálogo se reemplaza (p. ej. reload())."""
+        self.beginResetModel()
+        self._row_count = len(self.inventory_service.products)
+        self._rows = {}
+        self.endResetModel()
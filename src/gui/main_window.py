@@ -1,13 +1,17 @@
 from typing import Optional
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QTableWidget, QTableWidgetItem, QLineEdit, QLabel, QMessageBox, QInputDialog, QTabWidget, QFileDialog, QDateEdit, QToolBar
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QAbstractItemView,
+    QTableView, QLineEdit, QLabel, QMessageBox, QInputDialog, QTabWidget, QFileDialog, QDateEdit, QToolBar,
+    QProgressDialog
 )
 from PySide6.QtCore import Qt, QDate
-from src.inventory.models import Product
+from src.inventory.models import Product, ProductChange
 from src.inventory.services import InventoryService
+from src.gui.catalog_loader import CatalogLoader
+from src.gui.export_worker import ExportWorker
+from src.gui.inventory_model import InventoryTableModel
+from src.gui.print_service import PrintService
 from src.gui.sale_window import SaleWindow
-import pandas as pd
 from datetime import datetime
 
 class MainWindow(QMainWindow):
@@ -16,7 +20,14 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.setWindowTitle("Gestión de Inventario y Ventas")
         self.inventory_service = inventory_service
+        self.print_service = PrintService()
+        self.print_service.start()
+        self.catalog_loader: Optional[CatalogLoader] = None
+        self.export_worker: Optional[ExportWorker] = None
+        self._inventory_actions: list = []
         self._setup_ui()
+        self.inventory_service.subscribe(self._on_inventory_changed)
+        self._set_inventory_actions_enabled(self.inventory_service.loaded)
 
     def _setup_ui(self) -> None:
         """Configura los widgets de la ventana principal con tabs."""
@@ -26,23 +37,30 @@ class MainWindow(QMainWindow):
         self._setup_inventory_tab()
         tabs.addTab(self.inventory_tab, "Inventario")
         # Tab Ventas
-        self.sales_tab = SaleWindow(self.inventory_service, self)
+        self.sales_tab = SaleWindow(self.inventory_service, self, self.print_service)
         tabs.addTab(self.sales_tab, "Ventas")
         self.setCentralWidget(tabs)
         # Botón exportar CSV en un QToolBar
-        export_btn = QPushButton("Exportar resumen a CSV")
+        export_btn = QPushButton("Exportar resumen (Excel/CSV)")
         export_btn.clicked.connect(self._export_csv)
+        self.low_stock_btn = QPushButton()
+        self.low_stock_btn.clicked.connect(self._show_low_stock)
+        self._update_low_stock_button()
+        self._inventory_actions += [self.sales_tab, export_btn]
         toolbar = QToolBar("Exportar")
         toolbar.addWidget(export_btn)
+        toolbar.addWidget(self.low_stock_btn)
         self.addToolBar(Qt.TopToolBarArea, toolbar)
 
     def _setup_inventory_tab(self) -> None:
         layout = QVBoxLayout()
-        # Tabla de inventario
-        self.table = QTableWidget(0, 7)
-        self.table.setHorizontalHeaderLabels([
-            "Código", "Nombre", "Descripción", "Compra", "Venta Detal", "Venta Mayor", "Cantidad"
-        ])
+        # Tabla de inventario (modelo/vista: las celdas se piden solo al mostrarse)
+        self.table_model = InventoryTableModel(self.inventory_service, self)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.verticalHeader().setDefaultSectionSize(22)
         layout.addWidget(self.table)
         # Controles para agregar producto
         form_layout = QHBoxLayout()
@@ -60,6 +78,8 @@ class MainWindow(QMainWindow):
         self.wholesale_input.setPlaceholderText("Precio mayor")
         self.qty_input = QLineEdit()
         self.qty_input.setPlaceholderText("Cantidad")
+        self.reorder_input = QLineEdit()
+        self.reorder_input.setPlaceholderText("Punto de pedido")
         form_layout.addWidget(self.barcode_input)
         form_layout.addWidget(self.name_input)
         form_layout.addWidget(self.desc_input)
@@ -67,6 +87,7 @@ class MainWindow(QMainWindow):
         form_layout.addWidget(self.retail_input)
         form_layout.addWidget(self.wholesale_input)
         form_layout.addWidget(self.qty_input)
+        form_layout.addWidget(self.reorder_input)
         layout.addLayout(form_layout)
         # Botones
         btn_layout = QHBoxLayout()
@@ -79,22 +100,89 @@ class MainWindow(QMainWindow):
         btn_layout.addWidget(add_btn)
         btn_layout.addWidget(refill_btn)
         btn_layout.addWidget(edit_btn)
+        self._inventory_actions += [add_btn, refill_btn, edit_btn]
         layout.addLayout(btn_layout)
         self.inventory_tab.setLayout(layout)
-        self._refresh_table()
-
-    def _refresh_table(self) -> None:
-        """Actualiza la tabla de inventario."""
-        data = self.inventory_service.get_inventory_table()
-        self.table.setRowCount(len(data))
-        for row, prod in enumerate(data):
-            self.table.setItem(row, 0, QTableWidgetItem(str(prod["codigo_barras"])))
-            self.table.setItem(row, 1, QTableWidgetItem(prod["nombre"]))
-            self.table.setItem(row, 2, QTableWidgetItem(prod.get("descripcion") or ""))
-            self.table.setItem(row, 3, QTableWidgetItem(str(prod["precio_compra"])))
-            self.table.setItem(row, 4, QTableWidgetItem(str(prod["precio_detal"])))
-            self.table.setItem(row, 5, QTableWidgetItem(str(prod["precio_mayoreo"])))
-            self.table.setItem(row, 6, QTableWidgetItem(str(prod["unds"])))
+
+    def load_catalog(self) -> None:
+        """Carga el catálogo en segundo plano; las acciones se habilitan al terminar."""
+        self._set_inventory_actions_enabled(False)
+        self.statusBar().showMessage("Cargando catálogo...")
+        self.catalog_loader = CatalogLoader(self.inventory_service.repository.db.db_path, parent=self)
+        self.catalog_loader.page_loaded.connect(self._on_catalog_page)
+        self.catalog_loader.failed.connect(self._on_catalog_failed)
+        self.catalog_loader.finished.connect(self._on_catalog_loaded)
+        self.catalog_loader.start()
+
+    def _on_catalog_page(self, products: list) -> None:
+        self.inventory_service.extend_catalog(products)
+        self.statusBar().showMessage(f"Cargando catálogo... {len(self.inventory_service.products)} productos")
+
+    def _on_catalog_failed(self, message: str) -> None:
+        # Con un catálogo parcial las acciones quedan deshabilitadas: add_product no
+        # detectaría duplicados de los productos que faltan por cargar.
+        self.catalog_loader.finished.disconnect(self._on_catalog_loaded)
+        self.statusBar().showMessage("Error al cargar el catálogo")
+        QMessageBox.critical(self, "Error", f"No se pudo cargar el catálogo: {message}")
+
+    def _on_catalog_loaded(self) -> None:
+        self._set_inventory_actions_enabled(True)
+        self.statusBar().showMessage(f"{len(self.inventory_service.products)} productos", 5000)
+        # Después del conteo, para que el resumen de stock bajo quede visible
+        self.inventory_service.finish_loading()
+
+    def _set_inventory_actions_enabled(self, enabled: bool) -> None:
+        for widget in self._inventory_actions:
+            widget.setEnabled(enabled)
+
+    def _on_inventory_changed(self, change: ProductChange) -> None:
+        """Actualiza solo las filas y columnas que cambiaron."""
+        self._update_low_stock_button()
+        if change.kind == "low_stock":
+            # Las filas ya se refrescaron con el evento que causó la alerta
+            if len(change.barcodes) > 3:
+                self.statusBar().showMessage(f"Stock bajo: {len(change.barcodes)} productos por reponer", 10000)
+            else:
+                names = [self.inventory_service.get_product_by_barcode(b).name for b in change.barcodes]
+                self.statusBar().showMessage("Stock bajo: " + ", ".join(names), 10000)
+        elif change.kind == "reload":
+            self.table_model.reset()
+        elif change.kind == "load":
+            self.table_model.sync_rows()
+        else:
+            self.table_model.refresh_rows(change.barcodes, change.fields)
+
+    def _update_low_stock_button(self) -> None:
+        count = len(self.inventory_service.low_stock)
+        self.low_stock_btn.setText(f"Bajo stock ({count})")
+        self.low_stock_btn.setStyleSheet("color: #b00020; font-weight: bold;" if count else "")
+
+    def _show_low_stock(self) -> None:
+        """Muestra los productos en su punto de pedido o por debajo."""
+        products = self.inventory_service.get_low_stock_products()
+        if not products:
+            QMessageBox.information(self, "Bajo stock", "No hay productos por reponer.")
+            return
+        lines = [f"{p.barcode}  {p.name}: {p.quantity} (pedido: {p.reorder_point})" for p in products]
+        QMessageBox.warning(self, "Bajo stock", "\n".join(lines))
+
+    def closeEvent(self, event) -> None:
+        if self.catalog_loader is not None and self.catalog_loader.isRunning():
+            self.catalog_loader.requestInterruption()
+            self.catalog_loader.wait()
+        if self.export_worker is not None and self.export_worker.isRunning():
+            self.export_worker.wait()
+        self.print_service.stop(timeout=2)
+        # La ventana de ventas va embebida como pestaña y no recibe su propio closeEvent
+        self.sales_tab.searcher.close()
+        super().closeEvent(event)
+
+    def _selected_barcode(self) -> Optional[str]:
+        row = self.table.currentIndex().row()
+        if row < 0:
+            QMessageBox.warning(self, "Atención", "Seleccione un producto en la tabla.")
+            return None
+        return self.table_model.product_at(row).barcode
 
     def _add_product(self) -> None:
         """Agrega un producto al inventario desde los campos de entrada."""
@@ -106,36 +194,31 @@ class MainWindow(QMainWindow):
                 purchase_price=float(self.purchase_input.text()),
                 retail_price=float(self.retail_input.text()),
                 wholesale_price=float(self.wholesale_input.text()),
-                quantity=int(self.qty_input.text())
+                quantity=int(self.qty_input.text()),
+                reorder_point=int(self.reorder_input.text() or 0)
             )
             self.inventory_service.add_product(product)
-            self._refresh_table()
             self._clear_inputs()
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
 
     def _refill_product(self) -> None:
         """Permite hacer refill de un producto seleccionado."""
-        row = self.table.currentRow()
-        if row < 0:
-            QMessageBox.warning(self, "Atención", "Seleccione un producto en la tabla.")
+        barcode = self._selected_barcode()
+        if barcode is None:
             return
-        barcode = self.table.item(row, 0).text()
         amount, ok = QInputDialog.getInt(self, "Refill", "Cantidad a agregar:", 1, 1)
         if ok:
             try:
                 self.inventory_service.refill_product(barcode, amount)
-                self._refresh_table()
             except Exception as e:
                 QMessageBox.critical(self, "Error", str(e))
 
     def _edit_product(self) -> None:
         """Permite editar los datos de un producto seleccionado."""
-        row = self.table.currentRow()
-        if row < 0:
-            QMessageBox.warning(self, "Atención", "Seleccione un producto en la tabla.")
+        barcode = self._selected_barcode()
+        if barcode is None:
             return
-        barcode = self.table.item(row, 0).text()
         try:
             kwargs = {}
             if self.name_input.text():
@@ -150,8 +233,9 @@ class MainWindow(QMainWindow):
                 kwargs["wholesale_price"] = float(self.wholesale_input.text())
             if self.qty_input.text():
                 kwargs["quantity"] = int(self.qty_input.text())
+            if self.reorder_input.text():
+                kwargs["reorder_point"] = int(self.reorder_input.text())
             self.inventory_service.edit_product(barcode, **kwargs)
-            self._refresh_table()
             self._clear_inputs()
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
@@ -165,8 +249,10 @@ class MainWindow(QMainWindow):
         self.retail_input.clear()
         self.wholesale_input.clear()
         self.qty_input.clear()
+        self.reorder_input.clear()
 
     def _export_csv(self) -> None:
+        """Exporta inventario y ventas a .xlsx o a archivos CSV, en segundo plano."""
         # Pedir fechas
         start_date, ok1 = self._get_date("Fecha inicial")
         if not ok1:
@@ -175,20 +261,30 @@ class MainWindow(QMainWindow):
         if not ok2:
             return
         # Pedir ruta de archivo
-        path, _ = QFileDialog.getSaveFileName(self, "Guardar CSV", "resumen.csv", "CSV Files (*.csv)")
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Guardar resumen", "resumen.xlsx", "Excel (*.xlsx);;CSV (*.csv)"
+        )
         if not path:
             return
-        # Inventario
-        inventory = self.inventory_service.get_inventory_table()
-        df_inv = pd.DataFrame(inventory)
-        # Ventas
-        sales = self.sales_tab.sale_service.get_sales_summary(start_date, end_date)
-        df_sales = pd.DataFrame(sales)
-        # Guardar a Excel (CSV multi-sheet no existe, así que usamos Excel)
-        excel_path = path if path.endswith(".xlsx") else path + ".xlsx"
-        with pd.ExcelWriter(excel_path) as writer:
-            df_inv.to_excel(writer, sheet_name="Inventario", index=False)
-            df_sales.to_excel(writer, sheet_name="Ventas", index=False)
+        self.export_progress = QProgressDialog("Exportando...", None, 0, 0, self)
+        self.export_progress.setWindowTitle("Exportar resumen")
+        self.export_progress.setWindowModality(Qt.WindowModal)
+        self.export_progress.setMinimumDuration(300)
+        self.export_worker = ExportWorker(self.inventory_service.repository.db.db_path, start_date, end_date, path, self)
+        self.export_worker.progress.connect(
+            lambda rows: self.export_progress.setLabelText(f"Exportando... {rows} filas")
+        )
+        self.export_worker.completed.connect(self._on_export_completed)
+        self.export_worker.failed.connect(self._on_export_failed)
+        self.export_worker.start()
+
+    def _on_export_completed(self, paths: list) -> None:
+        self.export_progress.close()
+        QMessageBox.information(self, "Exportar resumen", "Archivos generados:\n" + "\n".join(paths))
+
+    def _on_export_failed(self, message: str) -> None:
+        self.export_progress.close()
+        QMessageBox.critical(self, "Error", f"No se pudo exportar: {message}")
 
     def _get_date(self, title: str) -> tuple[datetime, bool]:
         dlg = QDateEdit()
@@ -0,0 +1,211 @@
+import json
+import os
+import queue
+import threading
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from src.inventory.models import Sale
+from src.gui.print_ticket import open_usb_printer, ticket_lines, write_ticket
+
+PENDING = "pending"
+PRINTED = "printed"
+FAILED = "failed"
+
+@dataclass
+class PrintJob:
+    """Ticket en cola, con todo lo necesario para imprimirlo (o reimprimirlo) sin la venta."""
+    client_id: str
+    lines: List[list]
+    total: float
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    status: str = PENDING
+    attempts: int = 0
+    error: Optional[str] = None
+
+    @classmethod
+    def from_sale(cls, sale: Sale, total: float) -> "PrintJob":
+        return cls(client_id=sale.client_id, lines=[list(line) for line in ticket_lines(sale)], total=total)
+
+class PrintService:
+    """Cola de impresión atendida por un único hilo con una conexión persistente.
+
+    La impresora se abre una sola vez y se reutiliza; si falla, se cierra y se
+    reintenta con espera exponencial. Los trabajos no impresos se guardan en
+    backlog_path y se reanudan al reiniciar, y los tickets fallidos o ya impresos
+    pueden volver a encolarse con retry_failed() y reprint(). Del historial se
+    conservan los últimos keep_printed impresos y keep_failed fallidos.
+    """
+    def __init__(self, printer_factory: Callable[[], Any] = open_usb_printer,
+                 backlog_path: str = "print_backlog.json", max_retries: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 30.0, keep_printed: int = 20,
+                 keep_failed: int = 100, on_status: Optional[Callable[[PrintJob], None]] = None) -> None:
+        self.printer_factory = printer_factory
+        self.backlog_path = backlog_path
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.keep_printed = keep_printed
+        self.keep_failed = keep_failed
+        self.on_status = on_status
+        self._jobs: Dict[str, PrintJob] = {}
+        self._lock = threading.Lock()
+        # Serializa las escrituras del backlog fuera de _lock; _version cuenta los
+        # cambios y _saved_version el último que llegó a disco
+        self._save_lock = threading.Lock()
+        self._version = 0
+        self._saved_version = 0
+        self._queue: "queue.Queue[Optional[PrintJob]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._load_backlog()
+
+    def start(self) -> None:
+        """Inicia el hilo de impresión y reanuda los trabajos pendientes del backlog."""
+        if self._thread is not None:
+            return
+        # Cola y evento nuevos por hilo: un hilo anterior que no terminó a tiempo en
+        # stop() conserva los suyos y no compite con este
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        for job in self.jobs(PENDING):
+            self._queue.put(job)
+        self._thread = threading.Thread(target=self._run, args=(self._queue, self._stop),
+                                        name="ticket-printer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Detiene el hilo; lo que quede pendiente sigue en el backlog.
+
+        La impresora la cierra el propio hilo al salir. Si sigue bloqueado al vencer
+        timeout (p. ej. abriendo la impresora), termina por su cuenta más tarde.
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, sale: Sale, total: float) -> str:
+        """Encola el ticket de una venta y devuelve de inmediato el id del trabajo."""
+        return self._enqueue(PrintJob.from_sale(sale, total))
+
+    def reprint(self, job_id: str) -> str:
+        """Encola una copia de un ticket conocido (impreso o no)."""
+        with self._lock:
+            original = self._jobs[job_id]
+        return self._enqueue(PrintJob(client_id=original.client_id, lines=original.lines, total=original.total))
+
+    def retry_failed(self) -> List[str]:
+        """Vuelve a encolar los tickets que agotaron sus reintentos (p. ej. al reconectar la impresora)."""
+        retried = []
+        for job in self.jobs(FAILED):
+            job.status, job.attempts, job.error = PENDING, 0, None
+            retried.append(self._enqueue(job))
+        return retried
+
+    def jobs(self, status: Optional[str] = None) -> List[PrintJob]:
+        with self._lock:
+            return [job for job in self._jobs.values() if status is None or job.status == status]
+
+    def _enqueue(self, job: PrintJob) -> str:
+        self._update(job)
+        self._queue.put(job)
+        return job.job_id
+
+    def _run(self, jobs: "queue.Queue[Optional[PrintJob]]", stop: threading.Event) -> None:
+        # Solo este hilo usa la impresora: se abre, reutiliza y cierra aquí
+        printer = None
+        try:
+            while not stop.is_set():
+                job = jobs.get()
+                if job is None:
+                    break
+                if job.status == PENDING:
+                    printer = self._print_with_retries(job, printer, stop)
+        finally:
+            self._close_printer(printer)
+
+    def _print_with_retries(self, job: PrintJob, printer: Any, stop: threading.Event) -> Any:
+        """Imprime el trabajo y devuelve la impresora abierta (o None si falló)."""
+        for attempt in range(self.max_retries):
+            if stop.is_set():
+                return printer
+            try:
+                if printer is None:
+                    printer = self.printer_factory()
+                    if stop.is_set():
+                        # stop() venció mientras se abría: el trabajo queda para el siguiente hilo
+                        return printer
+                write_ticket(printer, job.client_id, job.lines, job.total)
+            except Exception as e:
+                job.attempts += 1
+                job.error = str(e)
+                self._close_printer(printer)
+                printer = None
+                self._update(job)
+                stop.wait(min(self.max_delay, self.base_delay * 2 ** attempt))
+                continue
+            job.status, job.error = PRINTED, None
+            self._update(job)
+            return printer
+        job.status = FAILED
+        self._update(job)
+        return printer
+
+    @staticmethod
+    def _close_printer(printer: Any) -> None:
+        if printer is not None:
+            try:
+                printer.close()
+            except Exception:
+                pass
+
+    def _update(self, job: PrintJob) -> None:
+        with self._lock:
+            self._jobs[job.job_id] = job
+            for status, keep in ((PRINTED, self.keep_printed), (FAILED, self.keep_failed)):
+                finished = [j for j in self._jobs.values() if j.status == status]
+                for old in finished[:max(0, len(finished) - keep)]:
+                    del self._jobs[old.job_id]
+            self._version += 1
+            version = self._version
+        self._persist(version)
+        if self.on_status is not None:
+            self.on_status(job)
+
+    def _persist(self, version: int) -> None:
+        """Guarda el backlog sin retener _lock durante la escritura a disco.
+
+        Si otro hilo ya guardó un estado igual o más nuevo mientras se esperaba el
+        turno, no hay nada que escribir.
+        """
+        with self._save_lock:
+            if version <= self._saved_version:
+                return
+            with self._lock:
+                snapshot = [asdict(job) for job in self._jobs.values()]
+                latest = self._version
+            self._save_backlog(snapshot)
+            self._saved_version = latest
+
+    def _load_backlog(self) -> None:
+        if not os.path.exists(self.backlog_path):
+            return
+        with open(self.backlog_path, encoding="utf-8") as f:
+            for data in json.load(f):
+                job = PrintJob(**data)
+                self._jobs[job.job_id] = job
+
+    def _save_backlog(self, snapshot: List[Dict[str, Any]]) -> None:
+        # Escritura atómica y sincronizada a disco antes del reemplazo: un corte de
+        # luz deja el backlog anterior o el nuevo, nunca uno a medias
+        tmp_path = f"{self.backlog_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.backlog_path)
@@ -1,35 +1,132 @@
-from typing import Any
-from escpos.printer import Usb
+import socket
+from functools import lru_cache
+from typing import Any, List, Sequence, Tuple
 from src.inventory.models import Sale
 
+# VID y PID genéricos, reemplazar si es necesario
+USB_VENDOR_ID = 0x04b8
+USB_PRODUCT_ID = 0x0202
+
+TicketLine = Tuple[str, int, float, float]
+
+# Comandos ESC/POS
+ESC_INIT = b"\x1b@"
+ESC_CODEPAGE_PC850 = b"\x1bt\x02"
+ESC_ALIGN_LEFT = b"\x1ba\x00"
+ESC_ALIGN_CENTER = b"\x1ba\x01"
+ESC_FONT_A = b"\x1bM\x00"
+GS_SIZE_NORMAL = b"\x1d!\x00"
+GS_SIZE_DOUBLE = b"\x1d!\x11"
+ESC_FEED_6 = b"\x1bd\x06"  # avanza 6 líneas para que el corte no caiga sobre el texto
+GS_CUT = b"\x1dV\x00"
+ENCODING = "cp850"
+
+SEPARATOR = "-----------------------------\n"
+
+
+def _encode(text: str) -> bytes:
+    return text.encode(ENCODING, errors="replace")
+
+
+@lru_cache(maxsize=None)
+def ticket_header() -> bytes:
+    """Encabezado fijo del ticket, renderizado una sola vez."""
+    return b"".join([
+        ESC_INIT, ESC_CODEPAGE_PC850,
+        ESC_ALIGN_CENTER, ESC_FONT_A, GS_SIZE_DOUBLE, _encode("TIENDA NUEVA\n"),
+        ESC_ALIGN_LEFT, ESC_FONT_A, GS_SIZE_NORMAL,
+    ])
+
+
+@lru_cache(maxsize=None)
+def ticket_columns() -> bytes:
+    return _encode(SEPARATOR + "Producto      Cant  Precio  Total\n" + SEPARATOR)
+
+
+@lru_cache(maxsize=None)
+def ticket_footer() -> bytes:
+    return _encode("\nGracias por su compra!\n\n") + ESC_FEED_6 + GS_CUT
+
+
+def render_ticket(client_id: str, lines: Sequence[Sequence], total: float) -> bytes:
+    """Construye en memoria el flujo ESC/POS completo de un ticket."""
+    rows = []
+    for product_name, quantity, unit_price, line_total in lines:
+        name = product_name[:10].ljust(10)
+        qty = str(quantity).rjust(4)
+        price = f"{unit_price:.2f}".rjust(7)
+        subtotal = f"{line_total:.2f}".rjust(7)
+        rows.append(f"{name}{qty}{price}{subtotal}\n")
+    rows.append(SEPARATOR + f"TOTAL:         ${total:.2f}\n")
+    return b"".join([
+        ticket_header(),
+        _encode(f"Cliente: {client_id}\n"),
+        ticket_columns(),
+        _encode("".join(rows)),
+        ticket_footer(),
+    ])
+
+
+def send_raw(p: Any, data: bytes) -> None:
+    """Envía el ticket en una sola escritura (_raw en python-escpos, write en los sustitutos)."""
+    if hasattr(p, "_raw"):
+        p._raw(data)
+    else:
+        p.write(data)
+
+
+class FilePrinter:
+    """Sustituto de impresora que escribe el flujo ESC/POS en un archivo (o dispositivo)."""
+    def __init__(self, path: str) -> None:
+        self.file = open(path, "ab")
+
+    def write(self, data: bytes) -> None:
+        self.file.write(data)
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class SocketPrinter:
+    """Impresora de red (puerto RAW 9100) o sustituto basado en socket."""
+    def __init__(self, host: str, port: int = 9100, timeout: float = 5.0) -> None:
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+
+    def write(self, data: bytes) -> None:
+        self.sock.sendall(data)
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+def open_usb_printer() -> Any:
+    """Abre la impresora USB (python-escpos se importa recién aquí)."""
+    from escpos.printer import Usb
+    return Usb(USB_VENDOR_ID, USB_PRODUCT_ID)
+
+
+def ticket_lines(sale: Sale) -> List[TicketLine]:
+    """Convierte los ítems de la venta en líneas (producto, cantidad, precio, total)."""
+    return [(item.product.name, item.quantity, item.unit_price, item.total) for item in sale.items]
+
+
+def write_ticket(p: Any, client_id: str, lines: Sequence[Sequence], total: float) -> None:
+    """Envía un ticket a una impresora ya abierta, prerenderizado y en una sola escritura."""
+    send_raw(p, render_ticket(client_id, lines, total))
+
 
 def print_sale_ticket(sale: Sale, total: float) -> None:
     """Imprime un ticket de venta en una impresora USB genérica usando python-escpos.
 
+    Es síncrona; la GUI usa PrintService para no bloquear la caja.
+
     Args:
         sale (Sale): Objeto de venta con los ítems vendidos.
         total (float): Total de la venta.
     """
-    # VID y PID genéricos, reemplazar si es necesario
     try:
-        p = Usb(0x04b8, 0x0202)
-        p.set(align='center', font='a', width=2, height=2)
-        p.text("TIENDA NUEVA\n")
-        p.set(align='left', font='a', width=1, height=1)
-        p.text(f"Cliente: {sale.client_id}\n")
-        p.text("-----------------------------\n")
-        p.text("Producto      Cant  Precio  Total\n")
-        p.text("-----------------------------\n")
-        for item in sale.items:
-            name = item.product.name[:10].ljust(10)
-            qty = str(item.quantity).rjust(4)
-            price = f"{item.unit_price:.2f}".rjust(7)
-            subtotal = f"{item.total:.2f}".rjust(7)
-            p.text(f"{name}{qty}{price}{subtotal}\n")
-        p.text("-----------------------------\n")
-        p.text(f"TOTAL:         ${total:.2f}\n")
-        p.text("\nGracias por su compra!\n\n")
-        p.cut()
+        write_ticket(open_usb_printer(), sale.client_id, ticket_lines(sale), total)
     except Exception as e:
         # Aquí podrías loggear el error o mostrar un mensaje en la GUI
-        print(f"Error al imprimir el ticket: {e}") 
\ No newline at end of file
+        print(f"Error al imprimir el ticket: {e}")
@@ -1,20 +1,47 @@
 from typing import Optional
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem,
-    QMessageBox, QInputDialog
+    QMessageBox, QInputDialog, QListWidget, QListWidgetItem
 )
-from PySide6.QtCore import Qt
-from src.inventory.services import InventoryService, SaleService
-from src.gui.print_ticket import print_sale_ticket
+from PySide6.QtCore import Qt, QTimer, Signal
+from src.inventory.search import ProductSearcher
+from src.inventory.services import InventoryRepository, InventoryService, SaleService
+from src.gui.print_service import FAILED, PRINTED, PrintJob, PrintService
+
+SEARCH_DEBOUNCE_MS = 150
+SEARCH_RESULTS = 10
 
 class SaleWindow(QDialog):
     """Ventana para registrar una venta."""
-    def __init__(self, inventory_service: InventoryService, parent=None) -> None:
+    # Emitida desde el hilo de búsqueda; Qt la entrega en el hilo de la GUI
+    search_results = Signal(int, str, list)
+    search_failed = Signal(int, str, str)
+    # Emitida desde el hilo de impresión con cada cambio de estado de un ticket
+    print_status = Signal(object)
+
+    def __init__(self, inventory_service: InventoryService, parent=None, print_service: Optional[PrintService] = None) -> None:
         super().__init__(parent)
         self.setWindowTitle("Registrar Venta")
         self.inventory_service = inventory_service
-        self.sale_service = SaleService(inventory_service)
+        if print_service is None:
+            print_service = PrintService()
+            print_service.start()
+        self.print_service = print_service
+        self.print_service.on_status = self.print_status.emit
+        self._last_job_id: Optional[str] = None
+        self.sale_service = SaleService(inventory_service, deferred_stock=True)
+        db_path = inventory_service.repository.db.db_path
+        self.searcher = ProductSearcher(
+            lambda: InventoryRepository(db_path, lazy_history=True),
+            self.search_results.emit,
+            limit=SEARCH_RESULTS,
+            on_error=self.search_failed.emit,
+        )
+        self._search_generation = 0
         self._setup_ui()
+        self.search_results.connect(self._show_suggestions)
+        self.search_failed.connect(self._on_search_failed)
+        self.print_status.connect(self._on_print_status)
 
     def _setup_ui(self) -> None:
         layout = QVBoxLayout()
@@ -45,6 +72,19 @@ class SaleWindow(QDialog):
         search_layout.addWidget(name_btn)
         layout.addLayout(search_layout)
 
+        # Búsqueda mientras se escribe: consulta en segundo plano tras una pausa breve
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self._submit_search)
+        self.name_input.textEdited.connect(lambda _: self.search_timer.start())
+        self.suggestions = QListWidget()
+        self.suggestions.setMaximumHeight(160)
+        self.suggestions.hide()
+        self.suggestions.itemActivated.connect(self._select_suggestion)
+        self.suggestions.itemClicked.connect(self._select_suggestion)
+        layout.addWidget(self.suggestions)
+
         # Info producto seleccionado
         self.selected_label = QLabel("")
         layout.addWidget(self.selected_label)
@@ -84,6 +124,18 @@ class SaleWindow(QDialog):
         self.total_label = QLabel("Total: $0.00")
         layout.addWidget(self.total_label)
 
+        # Impresión en segundo plano
+        print_layout = QHBoxLayout()
+        self.print_label = QLabel("")
+        reprint_btn = QPushButton("Reimprimir último ticket")
+        reprint_btn.clicked.connect(self._reprint_last)
+        retry_btn = QPushButton("Reintentar tickets fallidos")
+        retry_btn.clicked.connect(self._retry_failed_tickets)
+        print_layout.addWidget(self.print_label)
+        print_layout.addWidget(reprint_btn)
+        print_layout.addWidget(retry_btn)
+        layout.addLayout(print_layout)
+
         self.setLayout(layout)
         self.selected_product = None
 
@@ -101,28 +153,62 @@ class SaleWindow(QDialog):
         barcode = self.barcode_input.text().strip()
         product = self.inventory_service.get_product_by_barcode(barcode)
         if product:
-            self.selected_product = product
-            price_info = self._get_latest_price_info(product)
-            self.selected_label.setText(f"{product.name} (Stock: {product.quantity})\n{price_info}")
-            self.price_input.setText(str(product.retail_price))
+            self._select_product(product)
         else:
             QMessageBox.warning(self, "No encontrado", "Producto no encontrado.")
 
     def _search_by_name(self) -> None:
-        name = self.name_input.text().strip().lower()
-        matches = self.inventory_service.get_products_by_name(name)
+        name = self.name_input.text().strip()
+        matches = self.inventory_service.get_products_by_name(name, limit=1)
         if matches:
-            product = matches[0]
-            self.selected_product = product
-            price_info = self._get_latest_price_info(product)
-            self.selected_label.setText(f"{product.name} (Stock: {product.quantity})\n{price_info}")
-            self.price_input.setText(str(product.retail_price))
+            self.suggestions.hide()
+            self._select_product(matches[0])
         else:
             QMessageBox.warning(self, "No encontrado", "No hay coincidencias.")
 
+    def _submit_search(self) -> None:
+        text = self.name_input.text().strip()
+        if not text:
+            self.searcher.cancel()
+            self._search_generation = 0
+            self.suggestions.hide()
+            return
+        self._search_generation = self.searcher.submit(text)
+
+    def _show_suggestions(self, generation: int, text: str, products: list) -> None:
+        if generation != self._search_generation:
+            return
+        self.suggestions.clear()
+        for found in products:
+            # Usar la instancia compartida del servicio, no la del hilo de búsqueda
+            product = self.inventory_service.get_product_by_barcode(found.barcode) or found
+            item = QListWidgetItem(f"{product.name} ({product.barcode}) - Stock: {product.quantity}")
+            item.setData(Qt.UserRole, product.barcode)
+            self.suggestions.addItem(item)
+        self.suggestions.setVisible(bool(products))
+
+    def _on_search_failed(self, generation: int, text: str, message: str) -> None:
+        if generation != self._search_generation:
+            return
+        self.suggestions.clear()
+        self.suggestions.addItem(f"Error en la búsqueda: {message}")
+        self.suggestions.setVisible(True)
+
+    def _select_suggestion(self, item: QListWidgetItem) -> None:
+        product = self.inventory_service.get_product_by_barcode(item.data(Qt.UserRole))
+        if product:
+            self._select_product(product)
+        self.suggestions.hide()
+
+    def _select_product(self, product) -> None:
+        self.selected_product = product
+        price_info = self._get_latest_price_info(product)
+        self.selected_label.setText(f"{product.name} (Stock: {product.quantity})\n{price_info}")
+        self.price_input.setText(str(product.retail_price))
+
     def _get_latest_price_info(self, product) -> str:
-        if product.price_history:
-            latest = product.price_history[0]
+        latest = product.latest_price_change()
+        if latest:
             return f"Precio Detal: {latest.retail_price} | Precio Mayor: {latest.wholesale_price} (Actualizado: {latest.timestamp:%Y-%m-%d %H:%M})"
         return f"Precio Detal: {product.retail_price} | Precio Mayor: {product.wholesale_price}"
 
@@ -163,17 +249,32 @@ class SaleWindow(QDialog):
             # Guardar referencia a la venta antes de finalizarla
             sale = self.sale_service.current_sale
             total = self.sale_service.finalize_sale()
-            # Imprimir ticket si la venta existe
+            # Encolar el ticket: se imprime en segundo plano y la caja queda libre
             if sale is not None:
-                print_sale_ticket(sale, total)
-            # Refrescar inventario en la ventana principal
-            if hasattr(self.parent(), '_refresh_table'):
-                self.parent()._refresh_table()
+                self._last_job_id = self.print_service.submit(sale, total)
             QMessageBox.information(self, "Venta finalizada", f"Total a pagar: ${total:.2f}")
             self._reset_form()
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
 
+    def _on_print_status(self, job: PrintJob) -> None:
+        if job.status == PRINTED:
+            self.print_label.setText("Ticket impreso")
+        elif job.status == FAILED:
+            self.print_label.setText(f"No se pudo imprimir el ticket: {job.error}")
+        else:
+            self.print_label.setText(f"Imprimiendo ticket (intento {job.attempts + 1})...")
+
+    def _reprint_last(self) -> None:
+        if self._last_job_id is None:
+            QMessageBox.warning(self, "Atención", "No hay tickets para reimprimir.")
+            return
+        self._last_job_id = self.print_service.reprint(self._last_job_id)
+
+    def _retry_failed_tickets(self) -> None:
+        retried = self.print_service.retry_failed()
+        self.print_label.setText(f"{len(retried)} ticket(s) reenviados a la impresora")
+
     def _cancel_sale(self) -> None:
         self.sale_service.cancel_sale()
         self._reset_form()
@@ -182,9 +283,15 @@ class SaleWindow(QDialog):
         self.client_input.clear()
         self.barcode_input.clear()
         self.name_input.clear()
+        self.suggestions.clear()
+        self.suggestions.hide()
         self.selected_label.setText("")
         self.qty_input.clear()
         self.price_input.clear()
         self.items_table.setRowCount(0)
         self.total_label.setText("Total: $0.00")
-        self.selected_product = None 
\ No newline at end of file
+        self.selected_product = None 
+
+    def closeEvent(self, event) -> None:
+        self.searcher.close()
+        super().closeEvent(event)
@@ -0,0 +1,125 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from .models import Product, ProductChange
+
+
+class InventoryValue(NamedTuple):
+    """Valor total del inventario a cada precio."""
+    purchase: float
+    retail: float
+    wholesale: float
+
+
+class ColumnarCatalog:
+    """Réplica columnar del catálogo en arreglos NumPy para cálculos agregados.
+
+    Precios y cantidades viven en un arreglo por columna, con un índice
+    barcode → fila. Se suscribe a los eventos de InventoryService, así cada alta,
+    edición, reposición o venta actualiza solo las filas afectadas y los agregados
+    se calculan con operaciones vectorizadas en lugar de recorrer los Product.
+    """
+    def __init__(self, service, capacity: int = 1024) -> None:
+        self.service = service
+        self.barcodes: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._allocate(capacity)
+        self.rebuild()
+        service.subscribe(self._on_change)
+
+    def _allocate(self, capacity: int) -> None:
+        self._purchase = np.zeros(capacity, dtype=np.float64)
+        self._retail = np.zeros(capacity, dtype=np.float64)
+        self._wholesale = np.zeros(capacity, dtype=np.float64)
+        self._quantity = np.zeros(capacity, dtype=np.int64)
+
+    def _grow(self, needed: int) -> None:
+        if needed <= len(self._quantity):
+            return
+        capacity = max(needed, len(self._quantity) * 2)
+        for name in ("_purchase", "_retail", "_wholesale", "_quantity"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(self.barcodes)] = old[:len(self.barcodes)]
+            setattr(self, name, new)
+
+    def __len__(self) -> int:
+        return len(self.barcodes)
+
+    # Vistas de las filas ocupadas; no copian datos.
+    @property
+    def purchase_prices(self) -> np.ndarray:
+        return self._purchase[:len(self.barcodes)]
+
+    @property
+    def retail_prices(self) -> np.ndarray:
+        return self._retail[:len(self.barcodes)]
+
+    @property
+    def wholesale_prices(self) -> np.ndarray:
+        return self._wholesale[:len(self.barcodes)]
+
+    @property
+    def quantities(self) -> np.ndarray:
+        return self._quantity[:len(self.barcodes)]
+
+    def rebuild(self) -> None:
+        """Vuelve a copiar todo el catálogo del servicio en las columnas."""
+        products = self.service.products
+        n = len(products)
+        if n > len(self._quantity):
+            self._allocate(max(n, len(self._quantity) * 2))
+        self.barcodes = [p.barcode for p in products]
+        self.index = {barcode: row for row, barcode in enumerate(self.barcodes)}
+        self._purchase[:n] = [p.purchase_price for p in products]
+        self._retail[:n] = [p.retail_price for p in products]
+        self._wholesale[:n] = [p.wholesale_price for p in products]
+        self._quantity[:n] = [p.quantity for p in products]
+
+    def _write(self, product: Product) -> None:
+        row = self.index.get(product.barcode)
+        if row is None:
+            row = len(self.barcodes)
+            self._grow(row + 1)
+            self.barcodes.append(product.barcode)
+            self.index[product.barcode] = row
+        self._purchase[row] = product.purchase_price
+        self._retail[row] = product.retail_price
+        self._wholesale[row] = product.wholesale_price
+        self._quantity[row] = product.quantity
+
+    def _on_change(self, change: ProductChange) -> None:
+        if change.kind == "reload":
+            self.rebuild()
+            return
+        for barcode in change.barcodes:
+            product = self.service.get_product_by_barcode(barcode)
+            if product is not None:
+                self._write(product)
+
+    def close(self) -> None:
+        self.service.unsubscribe(self._on_change)
+
+    def inventory_value(self) -> InventoryValue:
+        """Valor del stock (cantidad × precio) a precio de compra, detal y mayoreo."""
+        quantities = self.quantities
+        return InventoryValue(
+            purchase=float(quantities @ self.purchase_prices),
+            retail=float(quantities @ self.retail_prices),
+            wholesale=float(quantities @ self.wholesale_prices),
+        )
+
+    def margins(self) -> np.ndarray:
+        """Margen relativo (detal - compra) / detal de cada producto con precio de detal."""
+        retail = self.retail_prices
+        priced = retail > 0
+        return (retail[priced] - self.purchase_prices[priced]) / retail[priced]
+
+    def margin_distribution(self, bins: int = 10,
+                            value_range: Optional[Tuple[float, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Histograma de márgenes: (conteos, bordes de los intervalos)."""
+        return np.histogram(self.margins(), bins=bins, range=value_range)
+
+    def below_threshold(self, threshold: int) -> List[str]:
+        """Códigos de los productos con cantidad menor a threshold, en orden de catálogo."""
+        rows = np.flatnonzero(self.quantities < threshold)
+        return [self.barcodes[row] for row in rows]
@@ -0,0 +1,62 @@
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+from .migrations import migrate
+
+
+class Database:
+    """Conexión SQLite compartida entre repositorios, con transacciones explícitas.
+
+    Los repositorios llaman a commit() tras cada escritura; dentro de un bloque
+    transaction() esos commits se agrupan y se confirman una sola vez al salir.
+    Al abrirse activa el modo WAL, para que una lectura larga (p. ej. una exportación)
+    no bloquee las ventas que se confirman mientras tanto, y aplica las migraciones
+    de esquema pendientes.
+    """
+    def __init__(self, db_path: str = "inventory.db") -> None:
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._depth = 0
+        self.schema_version = migrate(self.conn)
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._depth > 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Agrupa las escrituras del bloque en un único commit.
+
+        Los bloques anidados usan SAVEPOINT, de modo que un error interno capturado
+        solo deshace su propio bloque.
+        """
+        savepoint = f"sp_{self._depth}"
+        if self._depth:
+            self.conn.execute(f"SAVEPOINT {savepoint}")
+        elif not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+        self._depth += 1
+        try:
+            yield self.conn
+        except BaseException:
+            self._depth -= 1
+            if self._depth:
+                self.conn.execute(f"ROLLBACK TO {savepoint}")
+                self.conn.execute(f"RELEASE {savepoint}")
+            else:
+                self.conn.rollback()
+            raise
+        self._depth -= 1
+        if self._depth:
+            self.conn.execute(f"RELEASE {savepoint}")
+        else:
+            self.conn.commit()
+
+    def commit(self) -> None:
+        """Confirma los cambios salvo que haya una transacción abierta."""
+        if not self._depth:
+            self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
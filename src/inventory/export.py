@@ -0,0 +1,175 @@
+import csv
+import os
+import re
+import zipfile
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+from xml.sax.saxutils import escape
+from .database import Database
+from .models import SalesSummaryRow
+from .services import InventoryRepository, SaleRepository
+
+INVENTORY_HEADER = ("codigo_barras", "nombre", "descripcion", "precio_compra", "precio_detal", "precio_mayoreo", "unds")
+PROGRESS_EVERY = 1000
+
+ProgressCallback = Callable[[int], None]
+
+
+def write_csv(path: str, header: Sequence[str], rows: Iterable[Sequence]) -> int:
+    """Escribe filas a un CSV a medida que llegan y devuelve cuántas escribió."""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def export_sales_summary_csv(repository: SaleRepository, start_date: datetime, end_date: datetime, path: str, chunk_size: int = 1000) -> int:
+    """Exporta el resumen de ventas a CSV leyendo la base por bloques, con memoria constante."""
+    return write_csv(path, SalesSummaryRow._fields, repository.iter_sales_summary(start_date, end_date, chunk_size))
+
+
+def iter_inventory_rows(repository: InventoryRepository, page_size: int = 1000) -> Iterator[tuple]:
+    """Recorre el inventario por páginas, en el mismo formato que get_inventory_table."""
+    for page in repository.iter_product_pages(page_size=page_size):
+        for p in page.products:
+            yield (p.barcode, p.name, p.description, p.purchase_price, p.retail_price, p.wholesale_price, p.quantity)
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+# Caracteres de control que XML 1.0 no admite
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class XlsxStreamWriter:
+    """Escritor de .xlsx en streaming: cada hoja se escribe fila a fila dentro del zip.
+
+    Usa cadenas en línea (sin tabla de cadenas compartidas), así la memoria no crece
+    con la cantidad de filas.
+    """
+    def __init__(self, path: str) -> None:
+        self.zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        self.sheets: List[str] = []
+
+    def add_sheet(self, name: str, header: Sequence[str], rows: Iterable[Sequence]) -> int:
+        """Escribe una hoja completa y devuelve la cantidad de filas de datos."""
+        self.sheets.append(name)
+        count = 0
+        with self.zip.open(f"xl/worksheets/sheet{len(self.sheets)}.xml", "w", force_zip64=True) as f:
+            f.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            f.write(self._row(1, header))
+            for count, row in enumerate(rows, start=1):
+                f.write(self._row(count + 1, row))
+            f.write(b"</sheetData></worksheet>")
+        return count
+
+    @staticmethod
+    def _row(number: int, values: Sequence) -> bytes:
+        cells = []
+        for col, value in enumerate(values):
+            ref = f"{_column_letter(col)}{number}"
+            if value is None:
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+            else:
+                text = escape(_INVALID_XML.sub("", str(value)))
+                cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+        return f'<row r="{number}">{"".join(cells)}</row>'.encode("utf-8")
+
+    def close(self) -> None:
+        sheets = range(1, len(self.sheets) + 1)
+        overrides = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in sheets)
+        self.zip.writestr("[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            f'{overrides}</Types>')
+        self.zip.writestr("_rels/.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/></Relationships>')
+        sheet_entries = "".join(
+            f'<sheet name="{escape(name)}" sheetId="{i}" r:id="rId{i}"/>'
+            for i, name in zip(sheets, self.sheets))
+        self.zip.writestr("xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets>{sheet_entries}</sheets></workbook>')
+        rels = "".join(
+            f'<Relationship Id="rId{i}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{i}.xml"/>'
+            for i in sheets)
+        self.zip.writestr("xl/_rels/workbook.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{rels}</Relationships>')
+        self.zip.close()
+
+    def __enter__(self) -> "XlsxStreamWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def export_summary(db_path: str, start_date: datetime, end_date: datetime, path: str,
+                   progress: Optional[ProgressCallback] = None) -> List[str]:
+    """Exporta inventario y ventas del rango, en streaming desde la base.
+
+    Con extensión .csv genera dos archivos (<nombre>_inventario.csv y <nombre>_ventas.csv);
+    con cualquier otra, un .xlsx con las hojas "Inventario" y "Ventas". Abre su propia
+    conexión, así que puede ejecutarse en un hilo de fondo. progress recibe el total
+    acumulado de filas escritas.
+    """
+    db = Database(db_path)
+    inventory = InventoryRepository(db=db, lazy_history=True)
+    sales = SaleRepository(db=db)
+    written = 0
+
+    def counted(rows: Iterable[Sequence]) -> Iterator[Sequence]:
+        nonlocal written
+        for row in rows:
+            written += 1
+            if progress is not None and written % PROGRESS_EVERY == 0:
+                progress(written)
+            yield row
+
+    try:
+        if path.lower().endswith(".csv"):
+            base = path[:-4]
+            paths = [f"{base}_inventario.csv", f"{base}_ventas.csv"]
+            write_csv(paths[0], INVENTORY_HEADER, counted(iter_inventory_rows(inventory)))
+            write_csv(paths[1], SalesSummaryRow._fields, counted(sales.iter_sales_summary(start_date, end_date)))
+        else:
+            paths = [path if path.lower().endswith(".xlsx") else path + ".xlsx"]
+            with XlsxStreamWriter(paths[0]) as writer:
+                writer.add_sheet("Inventario", INVENTORY_HEADER, counted(iter_inventory_rows(inventory)))
+                writer.add_sheet("Ventas", SalesSummaryRow._fields, counted(sales.iter_sales_summary(start_date, end_date)))
+    finally:
+        db.close()
+    if progress is not None:
+        progress(written)
+    return [os.path.abspath(p) for p in paths]
@@ -0,0 +1,217 @@
+import sqlite3
+from datetime import datetime
+from typing import Callable, List
+from .search import normalize_search_key
+
+# Cada migración lleva el esquema de la versión N a la N+1 (PRAGMA user_version).
+# Nunca modificar una migración publicada: agregar una nueva al final.
+
+
+def _base_schema(conn: sqlite3.Connection) -> None:
+    """Tablas originales; las bases existentes ya las tienen."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS products (
+        barcode TEXT PRIMARY KEY,
+        name TEXT,
+        description TEXT,
+        purchase_price REAL,
+        retail_price REAL,
+        wholesale_price REAL,
+        quantity INTEGER
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS price_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_barcode TEXT,
+        retail_price REAL,
+        wholesale_price REAL,
+        timestamp TEXT
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS sales (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        client_id TEXT,
+        timestamp TEXT
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS sale_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sale_id INTEGER,
+        product_barcode TEXT,
+        quantity INTEGER,
+        unit_price REAL,
+        FOREIGN KEY(sale_id) REFERENCES sales(id)
+    )''')
+
+
+def _performance_indexes(conn: sqlite3.Connection) -> None:
+    """Índices para historial por producto, rangos de fechas de ventas y el join de ítems."""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_price_history_barcode_ts ON price_history(product_barcode, timestamp)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sales_timestamp ON sales(timestamp)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sale_items_sale_id ON sale_items(sale_id)')
+
+
+def _product_search_index(conn: sqlite3.Connection) -> None:
+    """Índice FTS5 sobre nombre y descripción, sincronizado con products mediante triggers.
+
+    Usa el rowid de products como clave; save_product hace UPSERT para que el rowid
+    de cada producto se mantenga estable.
+    """
+    conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, content='products', content_rowid='rowid'
+    )''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.rowid, old.name, old.description);
+    END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.rowid, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END''')
+    conn.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def _normalized_search_key(conn: sqlite3.Connection) -> None:
+    """Agrega products.search_key (nombre sin acentos ni mayúsculas) con su índice.
+
+    El índice FTS pasa a indexar search_key en lugar de name, de modo que nombre y
+    consulta se normalizan con la misma función.
+    """
+    conn.execute('ALTER TABLE products ADD COLUMN search_key TEXT')
+    rows = conn.execute('SELECT rowid, name FROM products').fetchall()
+    conn.executemany('UPDATE products SET search_key = ? WHERE rowid = ?',
+                     [(normalize_search_key(name), rowid) for rowid, name in rows])
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_products_search_key ON products(search_key)')
+    for trigger in ('products_fts_ai', 'products_fts_ad', 'products_fts_au'):
+        conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    conn.execute('DROP TABLE IF EXISTS products_fts')
+    conn.execute('''CREATE VIRTUAL TABLE products_fts USING fts5(
+        search_key, description, content='products', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )''')
+    conn.execute('''CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, search_key, description) VALUES (new.rowid, new.search_key, new.description);
+    END''')
+    conn.execute('''CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, search_key, description) VALUES ('delete', old.rowid, old.search_key, old.description);
+    END''')
+    # UPDATE OF dispara aunque el valor no cambie, y el upsert de save_product nombra
+    # siempre ambas columnas: sin WHEN, cada guardado de stock reindexaría el producto
+    conn.execute('''CREATE TRIGGER products_fts_au AFTER UPDATE OF search_key, description ON products
+    WHEN old.search_key IS NOT new.search_key OR old.description IS NOT new.description BEGIN
+        INSERT INTO products_fts(products_fts, rowid, search_key, description) VALUES ('delete', old.rowid, old.search_key, old.description);
+        INSERT INTO products_fts(rowid, search_key, description) VALUES (new.rowid, new.search_key, new.description);
+    END''')
+    conn.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def _listing_indexes(conn: sqlite3.Connection) -> None:
+    """Índices (clave de orden, barcode) para paginar el listado por cursor."""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_products_name_barcode ON products(name, barcode)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_products_quantity_barcode ON products(quantity, barcode)')
+
+
+def _sale_item_cost(conn: sqlite3.Connection) -> None:
+    """Agrega sale_items.unit_cost (costo de compra al momento de la venta).
+
+    Las ventas anteriores no guardaban el costo; se completan con el precio de compra
+    actual, que es la mejor aproximación disponible.
+    """
+    conn.execute('ALTER TABLE sale_items ADD COLUMN unit_cost REAL')
+    conn.execute('''UPDATE sale_items SET unit_cost = (
+        SELECT purchase_price FROM products WHERE products.barcode = sale_items.product_barcode
+    )''')
+
+
+def _daily_product_sales(conn: sqlite3.Connection) -> None:
+    """Tabla resumen con los totales diarios por producto, completada con las ventas existentes."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS daily_product_sales (
+        day TEXT NOT NULL,
+        product_barcode TEXT NOT NULL,
+        units INTEGER NOT NULL,
+        revenue REAL NOT NULL,
+        cost REAL NOT NULL,
+        PRIMARY KEY (day, product_barcode)
+    ) WITHOUT ROWID''')
+    conn.execute('''INSERT INTO daily_product_sales (day, product_barcode, units, revenue, cost)
+        SELECT substr(s.timestamp, 1, 10), si.product_barcode, SUM(si.quantity),
+               SUM(si.quantity * si.unit_price), SUM(si.quantity * COALESCE(si.unit_cost, 0))
+        FROM sales s JOIN sale_items si ON s.id = si.sale_id
+        GROUP BY 1, 2''')
+
+
+# Condición del índice parcial idx_products_low_stock. Las consultas deben repetirla
+# textualmente para que SQLite pueda usar el índice.
+LOW_STOCK_CONDITION = "reorder_point > 0 AND quantity <= reorder_point"
+
+
+def _reorder_points(conn: sqlite3.Connection) -> None:
+    """Agrega products.reorder_point y un índice parcial con los productos por reponer.
+
+    El índice solo contiene las filas en su punto de pedido o por debajo, así que
+    consultar la lista no recorre el catálogo.
+    """
+    conn.execute('ALTER TABLE products ADD COLUMN reorder_point INTEGER NOT NULL DEFAULT 0')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_products_low_stock ON products(barcode) WHERE {LOW_STOCK_CONDITION}')
+
+
+def _initial_price_history(conn: sqlite3.Connection) -> None:
+    """Registra los precios actuales de los productos que no tienen historial.
+
+    Antes add_product no guardaba los precios iniciales, así que un producto nunca
+    editado no tenía precio vigente en ninguna fecha. Como sus precios no cambiaron,
+    valen desde su primera venta (o desde ahora, si no tiene ventas).
+    """
+    conn.execute('''INSERT INTO price_history (product_barcode, retail_price, wholesale_price, timestamp)
+        SELECT p.barcode, p.retail_price, p.wholesale_price,
+               COALESCE((SELECT MIN(s.timestamp) FROM sales s
+                         JOIN sale_items si ON si.sale_id = s.id
+                         WHERE si.product_barcode = p.barcode), ?)
+        FROM products p
+        WHERE NOT EXISTS (SELECT 1 FROM price_history h WHERE h.product_barcode = p.barcode)''',
+                 (datetime.now().isoformat(),))
+
+
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _base_schema,
+    _performance_indexes,
+    _product_search_index,
+    _normalized_search_key,
+    _listing_indexes,
+    _sale_item_cost,
+    _daily_product_sales,
+    _reorder_points,
+    _initial_price_history,
+]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Aplica en orden las migraciones pendientes y devuelve la versión final.
+
+    Cada migración corre en su propia transacción junto con el cambio de versión,
+    así una base a medio actualizar nunca queda marcada como migrada. BEGIN IMMEDIATE
+    toma el bloqueo de escritura antes de releer la versión: si otra conexión migra
+    la misma base a la vez, esta espera y no repite los pasos que ya se aplicaron.
+    Una base ya actualizada no toma el bloqueo.
+    """
+    while schema_version(conn) < len(MIGRATIONS):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            version = schema_version(conn)
+            if version >= len(MIGRATIONS):
+                conn.rollback()
+                break
+            MIGRATIONS[version](conn)
+            conn.execute(f'PRAGMA user_version = {version + 1}')
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    return schema_version(conn)
+
+
+def explain_query_plan(conn: sqlite3.Connection, sql: str, params: tuple = ()) -> List[str]:
+    """Devuelve el detalle de EXPLAIN QUERY PLAN para verificar el uso de índices."""
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
@@ -1,7 +1,43 @@
-from typing import Optional, List
-from dataclasses import dataclass, field
+from bisect import bisect_left
+from typing import Any, Callable, NamedTuple, Optional, List, Sequence, Tuple
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 
+
+def slotted(cls):
+    """Recrea una dataclass con __slots__, como dataclass(slots=True) de Python 3.10+.
+
+    Sin __dict__ cada instancia ocupa bastante menos memoria, lo que importa cuando
+    el catálogo completo vive en memoria.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {k: v for k, v in cls.__dict__.items() if k not in names + ("__dict__", "__weakref__")}
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+class _EmptyHistory(list):
+    """Historial vacío compartido por todos los productos sin cambios de precio.
+
+    Es de solo lectura: para agregar entradas se asigna una lista nueva.
+    """
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("El historial vacío compartido es de solo lectura.")
+
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+
+
+EMPTY_HISTORY: List["ProductPriceHistory"] = _EmptyHistory()
+
+
+def _empty_history() -> List["ProductPriceHistory"]:
+    return EMPTY_HISTORY
+
+
+@slotted
 @dataclass
 class ProductPriceHistory:
     """Historial de precios de un producto."""
@@ -10,6 +46,33 @@ class ProductPriceHistory:
     wholesale_price: float
     timestamp: datetime
 
+class _AtOrBefore:
+    """Vista de un historial (del más reciente al más antiguo) como secuencia de
+    booleanos "timestamp <= when": False...False True...True, ordenada para bisect."""
+    __slots__ = ("history", "when")
+
+    def __init__(self, history: Sequence[ProductPriceHistory], when: datetime) -> None:
+        self.history = history
+        self.when = when
+
+    def __len__(self) -> int:
+        return len(self.history)
+
+    def __getitem__(self, i: int) -> bool:
+        return self.history[i].timestamp <= self.when
+
+
+def price_as_of(history: Sequence[ProductPriceHistory], when: datetime) -> Optional[ProductPriceHistory]:
+    """Entrada vigente en when (la más reciente con timestamp <= when), por búsqueda binaria.
+
+    history debe estar del más reciente al más antiguo, como price_history. Devuelve
+    None si when es anterior al primer cambio registrado.
+    """
+    i = bisect_left(_AtOrBefore(history, when), True)
+    return history[i] if i < len(history) else None
+
+
+@slotted
 @dataclass
 class Product:
     """Representa un producto en el inventario."""
@@ -20,8 +83,54 @@ class Product:
     retail_price: float = 0.0
     wholesale_price: float = 0.0
     quantity: int = 0
-    price_history: List[ProductPriceHistory] = field(default_factory=list)
-    
+    price_history: List[ProductPriceHistory] = field(default_factory=_empty_history, repr=False)
+    reorder_point: int = 0
+    _history_loader: Optional[Callable[[str, Optional[int]], List[ProductPriceHistory]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __getattr__(self, name: str):
+        # Solo se invoca para slots sin asignar: el cargador que nunca se fijó, o
+        # price_history cuando aún no se ha cargado
+        if name == "_history_loader":
+            return None
+        if name == "price_history":
+            loader = self._history_loader
+            history = loader(self.barcode, None) if loader else None
+            self.price_history = history or EMPTY_HISTORY
+            return self.price_history
+        raise AttributeError(name)
+
+    def history_loaded(self) -> bool:
+        """Indica si price_history ya está en memoria (leerlo no consultará la base)."""
+        try:
+            object.__getattribute__(self, "price_history")
+        except AttributeError:
+            return False
+        return True
+
+    def set_history_loader(self, loader: Callable[[str, Optional[int]], List[ProductPriceHistory]]) -> None:
+        """Difiere la carga del historial de precios hasta su primera lectura."""
+        self._history_loader = loader
+        if self.history_loaded():
+            del self.price_history
+
+    def latest_price_change(self) -> Optional[ProductPriceHistory]:
+        """Devuelve el cambio de precio más reciente sin cargar todo el historial."""
+        if self.history_loaded() or self._history_loader is None:
+            return self.price_history[0] if self.price_history else None
+        latest = self._history_loader(self.barcode, 1)
+        return latest[0] if latest else None
+
+    @property
+    def needs_reorder(self) -> bool:
+        """True si tiene punto de pedido y la cantidad llegó a él o está por debajo."""
+        return self.reorder_point > 0 and self.quantity <= self.reorder_point
+
+    def price_at(self, when: datetime) -> Optional[ProductPriceHistory]:
+        """Precios vigentes en when según el historial en memoria."""
+        return price_as_of(self.price_history, when)
+
     def refill(self, amount: int) -> None:
         """Agrega cantidad al inventario."""
         if amount < 0:
@@ -39,13 +148,18 @@ class Product:
         if ("retail_price" in kwargs and kwargs["retail_price"] != old_retail) or ("wholesale_price" in kwargs and kwargs["wholesale_price"] != old_wholesale):
             price_changed = True
         if price_changed:
-            self.price_history.append(ProductPriceHistory(
+            entry = ProductPriceHistory(
                 product_barcode=self.barcode,
                 retail_price=self.retail_price,
                 wholesale_price=self.wholesale_price,
                 timestamp=datetime.now()
-            ))
+            )
+            if self.price_history is EMPTY_HISTORY:
+                self.price_history = [entry]
+            else:
+                self.price_history.insert(0, entry)
 
+@slotted
 @dataclass
 class SaleItem:
     """Representa un ítem de venta (producto y cantidad)."""
@@ -58,6 +172,7 @@ class SaleItem:
         """Calcula el total del ítem de venta."""
         return self.quantity * self.unit_price
 
+@slotted
 @dataclass
 class Sale:
     """Representa una venta con múltiples ítems."""
@@ -79,4 +194,34 @@ class Sale:
 
     def clear(self) -> None:
         """Elimina todos los ítems de la venta."""
-        self.items.clear() 
\ No newline at end of file
+        self.items.clear() 
+
+@dataclass
+class ProductChange:
+    """Evento publicado por InventoryService cuando cambian productos.
+
+    kind es "add", "load", "refill", "edit", "stock", "sale" o "reload"; fields lista los
+    atributos modificados, o None si pudo cambiar cualquiera. Tras cada cambio que deja
+    productos en su punto de pedido o por debajo se publica además un evento "low_stock"
+    con los códigos que acaban de entrar en la lista de vigilancia; al terminar una carga
+    ("load" o "reload") se publica en su lugar uno solo con toda la lista.
+    """
+    kind: str
+    barcodes: List[str]
+    fields: Optional[List[str]] = None
+
+@dataclass
+class ProductPage:
+    """Una página del listado de productos y el cursor para pedir la siguiente."""
+    products: List[Product]
+    next_cursor: Optional[Tuple[Any, ...]] = None
+
+class SalesSummaryRow(NamedTuple):
+    """Línea del resumen de ventas; tupla liviana para recorrer rangos grandes."""
+    sale_id: int
+    client_id: str
+    timestamp: str
+    product_barcode: str
+    quantity: int
+    unit_price: float
+    total: float
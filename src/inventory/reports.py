@@ -0,0 +1,162 @@
+import argparse
+import sqlite3
+from datetime import date, datetime
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+from .database import Database
+from .migrations import LOW_STOCK_CONDITION
+
+# Expresión SQL de agrupación para cada dimensión. Los timestamps se guardan en ISO
+# 8601, así que el día y la hora se obtienen con substr sin convertir fechas.
+DIMENSIONS = {
+    "product": "si.product_barcode",
+    "day": "substr(s.timestamp, 1, 10)",
+    "hour": "substr(s.timestamp, 12, 2)",
+    "client": "s.client_id",
+}
+METRICS = ("units", "revenue", "cost", "margin", "sales")
+
+# Dimensiones y métricas disponibles en la tabla resumen daily_product_sales.
+ROLLUP_DIMENSIONS = {"product": "product_barcode", "day": "day"}
+ROLLUP_METRICS = ("units", "revenue", "cost", "margin")
+
+_ROLLUP_UPSERT = '''INSERT INTO daily_product_sales (day, product_barcode, units, revenue, cost)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(day, product_barcode) DO UPDATE SET
+        units = units + excluded.units,
+        revenue = revenue + excluded.revenue,
+        cost = cost + excluded.cost'''
+
+_ROLLUP_REBUILD = '''INSERT INTO daily_product_sales (day, product_barcode, units, revenue, cost)
+    SELECT substr(s.timestamp, 1, 10), si.product_barcode, SUM(si.quantity),
+           SUM(si.quantity * si.unit_price), SUM(si.quantity * COALESCE(si.unit_cost, 0))
+    FROM sales s JOIN sale_items si ON s.id = si.sale_id
+    GROUP BY 1, 2'''
+
+
+def add_to_daily_rollup(conn: sqlite3.Connection, day: date,
+                        lines: Iterable[Tuple[str, int, float, float]]) -> None:
+    """Suma las líneas (barcode, unidades, precio, costo) de una venta al resumen del día.
+
+    Se llama dentro de la transacción que guarda la venta, así el resumen nunca
+    queda desfasado de sale_items.
+    """
+    key = day.isoformat()[:10]
+    conn.executemany(_ROLLUP_UPSERT, [(key, barcode, quantity, quantity * price, quantity * (cost or 0))
+                                      for barcode, quantity, price, cost in lines])
+
+
+class ReportRow(NamedTuple):
+    """Fila agregada: clave del grupo y sus totales."""
+    key: str
+    units: int
+    revenue: float
+    cost: float
+    margin: float
+    sales: int
+
+
+class RollupRow(NamedTuple):
+    """Fila agregada a partir de la tabla resumen diaria."""
+    key: str
+    units: int
+    revenue: float
+    cost: float
+    margin: float
+
+
+class LowStockRow(NamedTuple):
+    """Producto en su punto de pedido o por debajo y cuánto falta para reponerlo."""
+    barcode: str
+    name: str
+    quantity: int
+    reorder_point: int
+    shortfall: int
+
+
+def low_stock_report(db: Database) -> List[LowStockRow]:
+    """Productos por reponer, los más faltantes primero.
+
+    Lee el índice parcial idx_products_low_stock, que solo contiene esas filas.
+    """
+    cur = db.conn.execute(f'''SELECT barcode, name, quantity, reorder_point, reorder_point - quantity AS shortfall
+        FROM products
+        WHERE {LOW_STOCK_CONDITION}
+        ORDER BY shortfall DESC, barcode''')
+    return [LowStockRow._make(row) for row in cur]
+
+
+class SalesReports:
+    """Reportes de ventas agregados en SQLite (GROUP BY), sin traer las líneas a Python."""
+    def __init__(self, db: Database) -> None:
+        self.db = db
+
+    def sales_report(self, by: str, start_date: datetime, end_date: datetime,
+                     top: Optional[int] = None, order_by: str = "revenue") -> List[ReportRow]:
+        """Unidades, ingresos, costo, margen y cantidad de ventas agrupados por dimensión.
+
+        by es "product", "day", "hour" (hora del día, 00-23) o "client". Con top se
+        devuelven los top grupos con mayor order_by; si no, todos ordenados por clave.
+        """
+        if by not in DIMENSIONS:
+            raise ValueError(f"Dimensión no soportada: {by}")
+        if order_by not in METRICS:
+            raise ValueError(f"Métrica no soportada: {order_by}")
+        order = f"{order_by} DESC, key" if top is not None else "key"
+        cur = self.db.conn.execute(f'''SELECT {DIMENSIONS[by]} AS key,
+                   SUM(si.quantity) AS units,
+                   SUM(si.quantity * si.unit_price) AS revenue,
+                   SUM(si.quantity * COALESCE(si.unit_cost, 0)) AS cost,
+                   SUM(si.quantity * (si.unit_price - COALESCE(si.unit_cost, 0))) AS margin,
+                   COUNT(DISTINCT s.id) AS sales
+            FROM sales s
+            JOIN sale_items si ON s.id = si.sale_id
+            WHERE s.timestamp BETWEEN ? AND ?
+            GROUP BY key
+            ORDER BY {order}
+            LIMIT ?''', (start_date.isoformat(), end_date.isoformat(), -1 if top is None else top))
+        return [ReportRow._make(row) for row in cur]
+
+    def daily_report(self, by: str, start_day: date, end_day: date,
+                     top: Optional[int] = None, order_by: str = "revenue") -> List[RollupRow]:
+        """Como sales_report, pero leyendo la tabla resumen diaria (días completos, ambos inclusive).
+
+        by es "product" o "day". Lee una fila por producto y día en lugar de cada
+        línea de venta, lo que lo hace adecuado para tableros y cierres de mes.
+        """
+        if by not in ROLLUP_DIMENSIONS:
+            raise ValueError(f"Dimensión no soportada: {by}")
+        if order_by not in ROLLUP_METRICS:
+            raise ValueError(f"Métrica no soportada: {order_by}")
+        order = f"{order_by} DESC, key" if top is not None else "key"
+        cur = self.db.conn.execute(f'''SELECT {ROLLUP_DIMENSIONS[by]} AS key,
+                   SUM(units) AS units, SUM(revenue) AS revenue, SUM(cost) AS cost,
+                   SUM(revenue - cost) AS margin
+            FROM daily_product_sales
+            WHERE day BETWEEN ? AND ?
+            GROUP BY key
+            ORDER BY {order}
+            LIMIT ?''', (start_day.isoformat()[:10], end_day.isoformat()[:10], -1 if top is None else top))
+        return [RollupRow._make(row) for row in cur]
+
+    def rebuild_daily_rollup(self) -> int:
+        """Recalcula la tabla resumen desde sales y sale_items; devuelve las filas generadas."""
+        with self.db.transaction() as conn:
+            conn.execute('DELETE FROM daily_product_sales')
+            conn.execute(_ROLLUP_REBUILD)
+            return conn.execute('SELECT COUNT(*) FROM daily_product_sales').fetchone()[0]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Reconstruye la tabla resumen diaria de ventas.")
+    parser.add_argument("db_path", nargs="?", default="inventory.db")
+    args = parser.parse_args(argv)
+    db = Database(args.db_path)
+    try:
+        rows = SalesReports(db).rebuild_daily_rollup()
+    finally:
+        db.close()
+    print(f"daily_product_sales: {rows} filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .models import Product
+    from .services import InventoryRepository
+
+
+def normalize_search_key(text: str) -> str:
+    """Clave de búsqueda sin acentos ni mayúsculas: 'Jamón  Serrano' -> 'jamon serrano'."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    """Menor cadena mayor que todas las que empiezan con prefix, para búsquedas por rango."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def build_fts_query(text: str) -> str:
+    """Convierte texto libre en una consulta FTS5 de prefijos: 'coca co' -> '"coca"* "co"*'."""
+    return " ".join('"{}"*'.format(token.replace('"', '""')) for token in re.findall(r"\w+", text))
+
+
+class ProductSearcher:
+    """Búsqueda por nombre en un hilo de fondo donde la última consulta siempre gana.
+
+    submit() descarta la consulta pendiente e interrumpe la que esté corriendo; los
+    resultados se entregan a on_results(generación, texto, productos) desde el hilo de
+    fondo, solo si ninguna consulta más nueva llegó mientras tanto. Los errores que no
+    son la interrupción (base bloqueada, tabla inexistente...) se entregan a
+    on_error(generación, texto, mensaje). El repositorio se crea dentro del hilo porque
+    una conexión SQLite no puede cambiar de hilo.
+    """
+    def __init__(self, repository_factory: Callable[[], "InventoryRepository"],
+                 on_results: Callable[[int, str, List["Product"]], None], limit: int = 10,
+                 on_error: Optional[Callable[[int, str, str], None]] = None) -> None:
+        self.repository_factory = repository_factory
+        self.on_results = on_results
+        self.on_error = on_error
+        self.limit = limit
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._pending: Optional[Tuple[int, str]] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="product-search", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> int:
+        """Encola una búsqueda reemplazando cualquier otra pendiente y devuelve su generación."""
+        with self._cond:
+            self._generation += 1
+            self._pending = (self._generation, text)
+            self._interrupt()
+            self._cond.notify()
+            return self._generation
+
+    def cancel(self) -> None:
+        """Descarta la consulta pendiente y la que esté en curso."""
+        with self._cond:
+            self._generation += 1
+            self._pending = None
+            self._interrupt()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._pending = None
+            self._interrupt()
+            self._cond.notify()
+        self._thread.join()
+
+    def _interrupt(self) -> None:
+        if self._busy and self._conn is not None:
+            self._conn.interrupt()
+
+    def _run(self) -> None:
+        repository = self.repository_factory()
+        self._conn = repository.conn
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    break
+                generation, text = self._pending
+                self._pending = None
+                self._busy = True
+            results, error = None, None
+            try:
+                results = repository.get_products_by_name(text, self.limit)
+            except sqlite3.Error as e:
+                # La interrupción por una consulta más nueva no es un error
+                if "interrupted" not in str(e):
+                    error = str(e)
+            with self._cond:
+                self._busy = False
+                stale = generation != self._generation
+            if stale:
+                continue
+            if results is not None:
+                self.on_results(generation, text, results)
+            elif error is not None and self.on_error is not None:
+                self.on_error(generation, text, error)
+        repository.conn.close()
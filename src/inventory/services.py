@@ -1,197 +1,457 @@
 import sqlite3
-from typing import List, Optional
-from .models import Product, Sale, SaleItem, ProductPriceHistory
-from datetime import datetime
+from dataclasses import fields
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from .models import EMPTY_HISTORY, price_as_of, Product, ProductChange, ProductPage, Sale, SaleItem, SalesSummaryRow, ProductPriceHistory
+from .database import Database
+from .migrations import LOW_STOCK_CONDITION
+from .reports import ReportRow, RollupRow, SalesReports, add_to_daily_rollup
+from .search import build_fts_query, normalize_search_key, prefix_upper_bound
+from datetime import date, datetime
+
+PRODUCT_COLUMNS = "barcode, name, description, purchase_price, retail_price, wholesale_price, quantity, reorder_point"
+SORT_KEYS = ("barcode", "name", "quantity")
 
 class InventoryRepository:
     """Repositorio para persistencia de productos e historial de precios en SQLite."""
-    def __init__(self, db_path: str = "inventory.db") -> None:
-        self.conn = sqlite3.connect(db_path)
-        self._create_tables()
+    def __init__(self, db_path: str = "inventory.db", lazy_history: bool = False, db: Optional[Database] = None) -> None:
+        self.db = db or Database(db_path)
+        self.conn = self.db.conn
+        self.lazy_history = lazy_history
+        self.query_count = 0
+        self.last_load_query_count = 0
 
-    def _create_tables(self) -> None:
-        cur = self.conn.cursor()
-        cur.execute('''CREATE TABLE IF NOT EXISTS products (
-            barcode TEXT PRIMARY KEY,
-            name TEXT,
-            description TEXT,
-            purchase_price REAL,
-            retail_price REAL,
-            wholesale_price REAL,
-            quantity INTEGER
-        )''')
-        cur.execute('''CREATE TABLE IF NOT EXISTS price_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            product_barcode TEXT,
-            retail_price REAL,
-            wholesale_price REAL,
-            timestamp TEXT
-        )''')
-        self.conn.commit()
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        """Ejecuta una consulta y la contabiliza en query_count."""
+        self.query_count += 1
+        return self.conn.execute(sql, params)
 
-    def save_product(self, product: Product) -> None:
-        cur = self.conn.cursor()
-        cur.execute('''REPLACE INTO products (barcode, name, description, purchase_price, retail_price, wholesale_price, quantity)
-            VALUES (?, ?, ?, ?, ?, ?, ?)''',
-            (product.barcode, product.name, product.description, product.purchase_price, product.retail_price, product.wholesale_price, product.quantity))
-        self.conn.commit()
+    def _row_to_product(self, row: tuple) -> Product:
+        return Product(
+            barcode=row[0], name=row[1], description=row[2], purchase_price=row[3],
+            retail_price=row[4], wholesale_price=row[5], quantity=row[6], reorder_point=row[7]
+        )
+
+    def _attach_histories(self, products: List[Product], histories: Optional[Dict[str, List[ProductPriceHistory]]] = None) -> None:
+        """Asigna el historial precargado o, en modo perezoso, el cargador bajo demanda."""
+        for product in products:
+            if self.lazy_history:
+                product.set_history_loader(self.get_price_history)
+            else:
+                product.price_history = histories.get(product.barcode, EMPTY_HISTORY)
+
+    def _products_from_rows(self, rows: List[tuple]) -> List[Product]:
+        """Convierte filas de products en Product con su historial (o su cargador perezoso)."""
+        products = [self._row_to_product(row) for row in rows]
+        histories = None if self.lazy_history else self.get_price_histories([p.barcode for p in products])
+        self._attach_histories(products, histories)
+        return products
+
+    def save_product(self, product: Product, quantity: Optional[int] = None) -> None:
+        """Guarda el producto; quantity, si se indica, reemplaza a product.quantity en la base."""
+        # UPSERT en vez de REPLACE: conserva el rowid que usa el índice de búsqueda
+        self._execute(f'''INSERT INTO products ({PRODUCT_COLUMNS}, search_key)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(barcode) DO UPDATE SET name = excluded.name, description = excluded.description,
+                purchase_price = excluded.purchase_price, retail_price = excluded.retail_price,
+                wholesale_price = excluded.wholesale_price, quantity = excluded.quantity,
+                reorder_point = excluded.reorder_point, search_key = excluded.search_key''',
+            (product.barcode, product.name, product.description, product.purchase_price, product.retail_price, product.wholesale_price,
+             product.quantity if quantity is None else quantity, product.reorder_point, normalize_search_key(product.name)))
+        self.db.commit()
 
     def save_price_history(self, history: ProductPriceHistory) -> None:
-        cur = self.conn.cursor()
-        cur.execute('''INSERT INTO price_history (product_barcode, retail_price, wholesale_price, timestamp)
+        self._execute('''INSERT INTO price_history (product_barcode, retail_price, wholesale_price, timestamp)
             VALUES (?, ?, ?, ?)''',
             (history.product_barcode, history.retail_price, history.wholesale_price, history.timestamp.isoformat()))
-        self.conn.commit()
+        self.db.commit()
 
     def get_all_products(self) -> List[Product]:
-        cur = self.conn.cursor()
-        cur.execute('SELECT * FROM products')
-        rows = cur.fetchall()
-        products = []
-        for row in rows:
-            product = Product(
-                barcode=row[0], name=row[1], description=row[2], purchase_price=row[3],
-                retail_price=row[4], wholesale_price=row[5], quantity=row[6]
-            )
-            product.price_history = self.get_price_history(product.barcode)
-            products.append(product)
+        """Carga todo el catálogo con su historial en un número constante de consultas.
+
+        El número de consultas emitidas queda en last_load_query_count.
+        """
+        start = self.query_count
+        products = [self._row_to_product(row) for row in self._execute(f'SELECT {PRODUCT_COLUMNS} FROM products')]
+        histories = None if self.lazy_history else self.get_all_price_histories()
+        self._attach_histories(products, histories)
+        self.last_load_query_count = self.query_count - start
         return products
 
     def get_product_by_barcode(self, barcode: str) -> Optional[Product]:
-        cur = self.conn.cursor()
-        cur.execute('SELECT * FROM products WHERE barcode = ?', (barcode,))
-        row = cur.fetchone()
-        if row:
-            product = Product(
-                barcode=row[0], name=row[1], description=row[2], purchase_price=row[3],
-                retail_price=row[4], wholesale_price=row[5], quantity=row[6]
-            )
-            product.price_history = self.get_price_history(product.barcode)
-            return product
-        return None
-
-    def get_products_by_name(self, name: str) -> List[Product]:
-        cur = self.conn.cursor()
-        cur.execute('SELECT * FROM products WHERE name LIKE ?', (f'%{name}%',))
-        rows = cur.fetchall()
-        products = []
+        rows = self._execute(f'SELECT {PRODUCT_COLUMNS} FROM products WHERE barcode = ?', (barcode,)).fetchall()
+        products = self._products_from_rows(rows)
+        return products[0] if products else None
+
+    def get_products_by_name(self, name: str, limit: Optional[int] = None) -> List[Product]:
+        """Busca sin distinguir acentos ni mayúsculas, de mejor a peor coincidencia.
+
+        Primero los nombres que empiezan con el texto (rango sobre idx_products_search_key)
+        y después las coincidencias por prefijo de palabra en nombre y descripción (FTS5).
+        """
+        key = normalize_search_key(name)
+        query = build_fts_query(key)
+        if not query:
+            return []
+        rows = self._execute(f'''SELECT {PRODUCT_COLUMNS} FROM products
+            WHERE search_key >= ? AND search_key < ?
+            ORDER BY search_key
+            LIMIT ?''', (key, prefix_upper_bound(key), -1 if limit is None else limit)).fetchall()
+        if limit is None or len(rows) < limit:
+            seen = {row[0] for row in rows}
+            columns = ", ".join(f"p.{c}" for c in PRODUCT_COLUMNS.split(", "))
+            ranked = self._execute(f'''SELECT {columns} FROM products_fts
+                JOIN products p ON p.rowid = products_fts.rowid
+                WHERE products_fts MATCH ?
+                ORDER BY bm25(products_fts, 10.0, 1.0)
+                LIMIT ?''', (query, -1 if limit is None else limit + len(rows)))
+            rows += [row for row in ranked if row[0] not in seen]
+            if limit is not None:
+                rows = rows[:limit]
+        return self._products_from_rows(rows)
+
+    def get_low_stock_products(self) -> List[Product]:
+        """Productos en su punto de pedido o por debajo, leídos del índice parcial."""
+        rows = self._execute(f'SELECT {PRODUCT_COLUMNS} FROM products WHERE {LOW_STOCK_CONDITION} ORDER BY barcode').fetchall()
+        return self._products_from_rows(rows)
+
+    def list_products(self, sort_by: str = "barcode", after: Optional[Tuple[Any, ...]] = None, limit: int = 100,
+                      name_prefix: Optional[str] = None, min_quantity: Optional[int] = None,
+                      max_quantity: Optional[int] = None) -> ProductPage:
+        """Devuelve una página del catálogo ordenada por sort_by, con paginación por cursor.
+
+        after es el next_cursor de la página anterior; a diferencia de OFFSET, cada página
+        cuesta lo mismo sin importar cuán adentro del catálogo esté.
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Orden no soportado: {sort_by}")
+        key = ("barcode",) if sort_by == "barcode" else (sort_by, "barcode")
+        conditions, params = [], []
+        if after is not None:
+            conditions.append(f"({', '.join(key)}) > ({', '.join('?' for _ in key)})")
+            params.extend(after)
+        # Un prefijo que queda vacío al normalizarlo ("  ", un acento suelto) no filtra
+        prefix = normalize_search_key(name_prefix) if name_prefix else ""
+        if prefix:
+            conditions.append("search_key >= ? AND search_key < ?")
+            params.extend([prefix, prefix_upper_bound(prefix)])
+        if min_quantity is not None:
+            conditions.append("quantity >= ?")
+            params.append(min_quantity)
+        if max_quantity is not None:
+            conditions.append("quantity <= ?")
+            params.append(max_quantity)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._execute(f'''SELECT {PRODUCT_COLUMNS} FROM products {where}
+            ORDER BY {', '.join(key)} LIMIT ?''', tuple(params) + (limit,)).fetchall()
+        products = self._products_from_rows(rows)
+        next_cursor = None
+        if len(products) == limit:
+            last = products[-1]
+            next_cursor = tuple(getattr(last, column) for column in key)
+        return ProductPage(products=products, next_cursor=next_cursor)
+
+    def iter_product_pages(self, sort_by: str = "barcode", page_size: int = 500, **filters) -> Iterator[ProductPage]:
+        """Recorre el catálogo página por página con memoria constante."""
+        cursor = None
+        while True:
+            page = self.list_products(sort_by, cursor, page_size, **filters)
+            if page.products:
+                yield page
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    def get_price_history(self, barcode: str, limit: Optional[int] = None) -> List[ProductPriceHistory]:
+        """Devuelve el historial de un producto, del más reciente al más antiguo."""
+        cur = self._execute('SELECT product_barcode, retail_price, wholesale_price, timestamp FROM price_history WHERE product_barcode = ? ORDER BY timestamp DESC LIMIT ?', (barcode, -1 if limit is None else limit))
+        return [self._row_to_history(row) for row in cur]
+
+    def get_price_at(self, barcode: str, when: datetime) -> Optional[ProductPriceHistory]:
+        """Precios vigentes de un producto en when: una lectura del índice (barcode, timestamp)."""
+        row = self._execute('''SELECT product_barcode, retail_price, wholesale_price, timestamp FROM price_history
+            WHERE product_barcode = ? AND timestamp <= ? ORDER BY timestamp DESC LIMIT 1''', (barcode, when.isoformat())).fetchone()
+        return self._row_to_history(row) if row else None
+
+    def get_prices_at(self, lookups: List[Tuple[str, datetime]]) -> List[Optional[ProductPriceHistory]]:
+        """Precios vigentes para cada par (barcode, when), en el mismo orden.
+
+        Carga una sola vez el historial de los productos involucrados y resuelve cada
+        par por búsqueda binaria, en lugar de una consulta por par.
+        """
+        histories = self.get_price_histories(list(dict.fromkeys(barcode for barcode, _ in lookups)))
+        return [price_as_of(histories.get(barcode, EMPTY_HISTORY), when) for barcode, when in lookups]
+
+    def get_all_price_histories(self) -> Dict[str, List[ProductPriceHistory]]:
+        """Devuelve el historial de todos los productos, agrupado por código y del más reciente al más antiguo."""
+        cur = self._execute('SELECT product_barcode, retail_price, wholesale_price, timestamp FROM price_history ORDER BY product_barcode, timestamp DESC')
+        return self._group_histories(cur)
+
+    def get_price_histories(self, barcodes: List[str]) -> Dict[str, List[ProductPriceHistory]]:
+        """Devuelve el historial de varios productos en una sola consulta."""
+        grouped: Dict[str, List[ProductPriceHistory]] = {}
+        # SQLite limita la cantidad de parámetros por consulta
+        for i in range(0, len(barcodes), 500):
+            chunk = tuple(barcodes[i:i + 500])
+            placeholders = ", ".join("?" for _ in chunk)
+            cur = self._execute(f'SELECT product_barcode, retail_price, wholesale_price, timestamp FROM price_history WHERE product_barcode IN ({placeholders}) ORDER BY product_barcode, timestamp DESC', chunk)
+            grouped.update(self._group_histories(cur))
+        return grouped
+
+    def _group_histories(self, rows) -> Dict[str, List[ProductPriceHistory]]:
+        grouped: Dict[str, List[ProductPriceHistory]] = {}
         for row in rows:
-            product = Product(
-                barcode=row[0], name=row[1], description=row[2], purchase_price=row[3],
-                retail_price=row[4], wholesale_price=row[5], quantity=row[6]
-            )
-            product.price_history = self.get_price_history(product.barcode)
-            products.append(product)
-        return products
+            grouped.setdefault(row[0], []).append(self._row_to_history(row))
+        return grouped
 
-    def get_price_history(self, barcode: str) -> List[ProductPriceHistory]:
-        cur = self.conn.cursor()
-        cur.execute('SELECT product_barcode, retail_price, wholesale_price, timestamp FROM price_history WHERE product_barcode = ? ORDER BY timestamp DESC', (barcode,))
-        rows = cur.fetchall()
-        return [ProductPriceHistory(product_barcode=row[0], retail_price=row[1], wholesale_price=row[2], timestamp=datetime.fromisoformat(row[3])) for row in rows]
+    @staticmethod
+    def _row_to_history(row: tuple) -> ProductPriceHistory:
+        return ProductPriceHistory(product_barcode=row[0], retail_price=row[1], wholesale_price=row[2], timestamp=datetime.fromisoformat(row[3]))
 
 class SaleRepository:
     """Repositorio para persistencia de ventas (básico, solo estructura)."""
-    def __init__(self, db_path: str = "inventory.db") -> None:
-        self.conn = sqlite3.connect(db_path)
-        self._create_tables()
-
-    def _create_tables(self) -> None:
-        cur = self.conn.cursor()
-        cur.execute('''CREATE TABLE IF NOT EXISTS sales (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            client_id TEXT,
-            timestamp TEXT
-        )''')
-        cur.execute('''CREATE TABLE IF NOT EXISTS sale_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sale_id INTEGER,
-            product_barcode TEXT,
-            quantity INTEGER,
-            unit_price REAL,
-            FOREIGN KEY(sale_id) REFERENCES sales(id)
-        )''')
-        self.conn.commit()
+    def __init__(self, db_path: str = "inventory.db", db: Optional[Database] = None) -> None:
+        self.db = db or Database(db_path)
+        self.conn = self.db.conn
 
     def save_sale(self, sale: Sale, timestamp: datetime) -> int:
-        cur = self.conn.cursor()
-        cur.execute('INSERT INTO sales (client_id, timestamp) VALUES (?, ?)', (sale.client_id, timestamp.isoformat()))
-        sale_id = cur.lastrowid
-        for item in sale.items:
-            cur.execute('''INSERT INTO sale_items (sale_id, product_barcode, quantity, unit_price) VALUES (?, ?, ?, ?)''',
-                        (sale_id, item.product.barcode, item.quantity, item.unit_price))
-        self.conn.commit()
+        """Guarda la venta y sus ítems en una sola transacción.
+
+        En la misma transacción suma la venta a la tabla resumen daily_product_sales.
+        Si se llama dentro de un db.transaction() externo, queda incluida en él.
+        """
+        with self.db.transaction() as conn:
+            cur = conn.cursor()
+            cur.execute('INSERT INTO sales (client_id, timestamp) VALUES (?, ?)', (sale.client_id, timestamp.isoformat()))
+            sale_id = cur.lastrowid
+            cur.executemany('''INSERT INTO sale_items (sale_id, product_barcode, quantity, unit_price, unit_cost) VALUES (?, ?, ?, ?, ?)''',
+                            [(sale_id, item.product.barcode, item.quantity, item.unit_price, item.product.purchase_price) for item in sale.items])
+            add_to_daily_rollup(conn, timestamp, [(item.product.barcode, item.quantity, item.unit_price, item.product.purchase_price)
+                                                  for item in sale.items])
         return sale_id
 
     def get_sales_summary(self, start_date: datetime, end_date: datetime) -> List[dict]:
+        return [row._asdict() for row in self.iter_sales_summary(start_date, end_date)]
+
+    def iter_sales_summary(self, start_date: datetime, end_date: datetime, chunk_size: int = 1000) -> Iterator[SalesSummaryRow]:
+        """Recorre las líneas de venta del rango en bloques de chunk_size, con memoria constante."""
         cur = self.conn.cursor()
-        cur.execute('''SELECT s.id, s.client_id, s.timestamp, si.product_barcode, si.quantity, si.unit_price
+        cur.execute('''SELECT s.id, s.client_id, s.timestamp, si.product_barcode, si.quantity, si.unit_price,
+                              si.quantity * si.unit_price
                        FROM sales s
                        JOIN sale_items si ON s.id = si.sale_id
                        WHERE s.timestamp BETWEEN ? AND ?
                        ORDER BY s.timestamp''',
                     (start_date.isoformat(), end_date.isoformat()))
-        rows = cur.fetchall()
-        summary = []
-        for row in rows:
-            summary.append({
-                'sale_id': row[0],
-                'client_id': row[1],
-                'timestamp': row[2],
-                'product_barcode': row[3],
-                'quantity': row[4],
-                'unit_price': row[5],
-                'total': row[4] * row[5]
-            })
-        return summary
+        try:
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield SalesSummaryRow._make(row)
+        finally:
+            cur.close()
 
 class InventoryService:
-    """Servicio para gestionar el inventario de productos con persistencia."""
-    def __init__(self, repository: Optional[InventoryRepository] = None) -> None:
+    """Servicio para gestionar el inventario de productos con persistencia.
+
+    Con autoload=False el catálogo empieza vacío y se completa con extend_catalog(),
+    por ejemplo desde un hilo de carga en segundo plano.
+    """
+    def __init__(self, repository: Optional[InventoryRepository] = None, autoload: bool = True) -> None:
         self.repository = repository or InventoryRepository()
-        self.products: List[Product] = self.repository.get_all_products()
+        self.products: List[Product] = []
+        self._by_barcode: Dict[str, Product] = {}
+        self.last_changed: List[str] = []
+        self._listeners: List[Callable[[ProductChange], None]] = []
+        # Lista de vigilancia de stock bajo, mantenida por mark_changed
+        self.low_stock: Dict[str, Product] = {}
+        # Unidades apartadas en carritos abiertos (deferred_stock): ya descontadas de
+        # Product.quantity en memoria, pero no de la base hasta finalizar la venta
+        self.reserved: Dict[str, int] = {}
+        self.loaded = False
+        if autoload:
+            self.reload()
+
+    def subscribe(self, listener: Callable[[ProductChange], None]) -> None:
+        """Registra una función que recibe un ProductChange tras cada modificación."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[ProductChange], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def reload(self) -> None:
+        """Relee el catálogo conservando las instancias ya conocidas (mapa de identidad)."""
+        products = []
+        for fresh in self.repository.get_all_products():
+            current = self._by_barcode.get(fresh.barcode)
+            if current is not None:
+                for f in fields(Product):
+                    if f.name != "price_history":
+                        setattr(current, f.name, getattr(fresh, f.name))
+                if fresh.history_loaded():
+                    current.price_history = fresh.price_history
+                else:
+                    current.set_history_loader(fresh._history_loader)
+                fresh = current
+            fresh.quantity -= self.reserved.get(fresh.barcode, 0)
+            products.append(fresh)
+        self.products = products
+        self._by_barcode = {p.barcode: p for p in products}
+        self.mark_changed(list(self._by_barcode), "reload")
+        self.finish_loading()
+
+    def extend_catalog(self, products: List[Product]) -> None:
+        """Agrega al catálogo en memoria productos cargados por otro repositorio.
+
+        El historial queda ligado a este repositorio, ya que la conexión de origen puede
+        pertenecer a otro hilo.
+        """
+        added = []
+        for product in products:
+            if product.barcode in self._by_barcode:
+                continue
+            product.set_history_loader(self.repository.get_price_history)
+            self.products.append(product)
+            self._by_barcode[product.barcode] = product
+            added.append(product.barcode)
+        self.mark_changed(added, "load")
+
+    def finish_loading(self) -> None:
+        """Marca el catálogo como completo y publica un único resumen de stock bajo."""
+        self.loaded = True
+        if self.low_stock:
+            self._notify(ProductChange(kind="low_stock", barcodes=list(self.low_stock), fields=["quantity"]))
+
+    def mark_changed(self, barcodes: List[str], kind: str, fields: Optional[List[str]] = None) -> None:
+        """Registra los productos modificados por la última operación y avisa a los suscriptores."""
+        self.last_changed = list(dict.fromkeys(barcodes))
+        entered = self._update_low_stock(self.last_changed, kind)
+        self._notify(ProductChange(kind=kind, barcodes=self.last_changed, fields=fields))
+        # Durante la carga no se avisa página por página: finish_loading() resume al final
+        if entered and kind not in ("load", "reload"):
+            self._notify(ProductChange(kind="low_stock", barcodes=entered, fields=["quantity"]))
+
+    def _notify(self, change: ProductChange) -> None:
+        for listener in list(self._listeners):
+            listener(change)
+
+    def _update_low_stock(self, barcodes: List[str], kind: str) -> List[str]:
+        """Actualiza la lista de vigilancia solo con los productos cambiados.
+
+        Devuelve los códigos que acaban de entrar. Se evalúa sobre el stock confirmado:
+        lo apartado en carritos abiertos no dispara alertas hasta que se vende.
+        reload() reemplaza el catálogo completo, así que en ese caso la lista se
+        reconstruye.
+        """
+        if kind == "reload":
+            self.low_stock = {}
+        entered = []
+        for barcode in barcodes:
+            product = self._by_barcode.get(barcode)
+            if product is not None and self._needs_reorder(product):
+                if barcode not in self.low_stock:
+                    self.low_stock[barcode] = product
+                    entered.append(barcode)
+            else:
+                self.low_stock.pop(barcode, None)
+        return entered
+
+    def _needs_reorder(self, product: Product) -> bool:
+        """Como Product.needs_reorder, pero con el stock confirmado en lugar del disponible."""
+        return product.reorder_point > 0 and self.committed_quantity(product) <= product.reorder_point
+
+    def get_low_stock_products(self) -> List[Product]:
+        """Productos en su punto de pedido o por debajo, de menor a mayor cantidad confirmada."""
+        return sorted(self.low_stock.values(), key=lambda p: (self.committed_quantity(p) - p.reorder_point, p.barcode))
+
+    def set_reorder_point(self, barcode: str, reorder_point: int) -> None:
+        self.edit_product(barcode, reorder_point=reorder_point)
+
+    @staticmethod
+    def _check_reorder_point(reorder_point: int) -> None:
+        if reorder_point < 0:
+            raise ValueError("El punto de pedido no puede ser negativo.")
+
+    def committed_quantity(self, product: Product) -> int:
+        """Stock confirmado: lo disponible en memoria más lo apartado en carritos abiertos."""
+        return product.quantity + self.reserved.get(product.barcode, 0)
+
+    def reserve(self, barcode: str, quantity: int) -> None:
+        """Registra (o, con quantity negativa, libera) unidades apartadas en un carrito."""
+        remaining = self.reserved.get(barcode, 0) + quantity
+        if remaining:
+            self.reserved[barcode] = remaining
+        else:
+            self.reserved.pop(barcode, None)
+
+    def save_product(self, product: Product) -> None:
+        """Persiste el producto con su stock confirmado, sin los apartados de carritos."""
+        self.repository.save_product(product, self.committed_quantity(product))
 
     def add_product(self, product: Product) -> None:
         if self.get_product_by_barcode(product.barcode):
             raise ValueError(f"El producto con código {product.barcode} ya existe.")
+        self._check_reorder_point(product.reorder_point)
         self.products.append(product)
-        self.repository.save_product(product)
-        if product.price_history:
+        self._by_barcode[product.barcode] = product
+        if not product.price_history:
+            # Precios iniciales: sin esta entrada, las consultas por fecha de un producto
+            # nunca editado no encontrarían precio vigente
+            product.price_history = [ProductPriceHistory(
+                product_barcode=product.barcode, retail_price=product.retail_price,
+                wholesale_price=product.wholesale_price, timestamp=datetime.now())]
+        with self.repository.db.transaction():
+            self.save_product(product)
             for h in product.price_history:
                 self.repository.save_price_history(h)
+        self.mark_changed([product.barcode], "add")
 
     def refill_product(self, barcode: str, amount: int) -> None:
         product = self.get_product_by_barcode(barcode)
         if not product:
             raise ValueError(f"Producto con código {barcode} no encontrado.")
         product.refill(amount)
-        self.repository.save_product(product)
-        self.products = self.repository.get_all_products()
+        self.save_product(product)
+        self.mark_changed([barcode], "refill", ["quantity"])
 
     def edit_product(self, barcode: str, **kwargs) -> None:
         product = self.get_product_by_barcode(barcode)
         if not product:
             raise ValueError(f"Producto con código {barcode} no encontrado.")
+        if "reorder_point" in kwargs:
+            self._check_reorder_point(kwargs["reorder_point"])
         old_retail = product.retail_price
         old_wholesale = product.wholesale_price
         product.update(**kwargs)
-        self.repository.save_product(product)
+        self.save_product(product)
         if ("retail_price" in kwargs and kwargs["retail_price"] != old_retail) or ("wholesale_price" in kwargs and kwargs["wholesale_price"] != old_wholesale):
-            history = ProductPriceHistory(
-                product_barcode=product.barcode,
-                retail_price=product.retail_price,
-                wholesale_price=product.wholesale_price,
-                timestamp=datetime.now()
-            )
-            self.repository.save_price_history(history)
-            product.price_history.insert(0, history)
-        self.products = self.repository.get_all_products()
+            # Product.update ya registró el cambio al inicio del historial
+            self.repository.save_price_history(product.price_history[0])
+        self.mark_changed([barcode], "edit", [key for key in kwargs if hasattr(product, key)])
 
     def get_product_by_barcode(self, barcode: str) -> Optional[Product]:
-        return self.repository.get_product_by_barcode(barcode)
+        return self._by_barcode.get(barcode)
+
+    def get_products_by_name(self, name: str, limit: Optional[int] = None) -> List[Product]:
+        return [self._by_barcode.get(p.barcode, p) for p in self.repository.get_products_by_name(name, limit)]
+
+    def list_products(self, sort_by: str = "barcode", after: Optional[Tuple[Any, ...]] = None, limit: int = 100, **filters) -> ProductPage:
+        """Página del catálogo con las instancias compartidas del servicio."""
+        page = self.repository.list_products(sort_by, after, limit, **filters)
+        page.products = [self._by_barcode.get(p.barcode, p) for p in page.products]
+        return page
+
+    def get_price_at(self, barcode: str, when: datetime) -> Optional[ProductPriceHistory]:
+        """Precios vigentes en when; usa el historial en memoria si ya está cargado."""
+        product = self._by_barcode.get(barcode)
+        if product is not None and product.history_loaded():
+            return product.price_at(when)
+        return self.repository.get_price_at(barcode, when)
 
-    def get_products_by_name(self, name: str) -> List[Product]:
-        return self.repository.get_products_by_name(name)
+    def get_prices_at(self, lookups: List[Tuple[str, datetime]]) -> List[Optional[ProductPriceHistory]]:
+        return self.repository.get_prices_at(lookups)
 
     def get_inventory_table(self) -> List[dict]:
         return [{
@@ -205,12 +465,28 @@ class InventoryService:
         } for p in self.products]
 
 class SaleService:
-    """Servicio para gestionar el proceso de ventas."""
-    def __init__(self, inventory_service: InventoryService, repository: Optional[SaleRepository] = None) -> None:
+    """Servicio para gestionar el proceso de ventas.
+
+    Con deferred_stock las unidades del carrito se apartan en
+    InventoryService.reserved en lugar de escribirse: la base conserva el stock
+    confirmado hasta que finalize_sale guarda la venta y el descuento en una única
+    transacción. Quitar ítems o cancelar solo libera lo apartado.
+    """
+    def __init__(self, inventory_service: InventoryService, repository: Optional[SaleRepository] = None, deferred_stock: bool = False) -> None:
         self.inventory_service = inventory_service
-        self.repository = repository or SaleRepository()
+        self.deferred_stock = deferred_stock
+        self.repository = repository or SaleRepository(db=inventory_service.repository.db)
         self.current_sale: Optional[Sale] = None
 
+    def _move_stock(self, product: Product, quantity: int) -> None:
+        """Descuenta (o devuelve, con quantity negativa) unidades del carrito."""
+        product.quantity -= quantity
+        if self.deferred_stock:
+            self.inventory_service.reserve(product.barcode, quantity)
+        else:
+            self.inventory_service.save_product(product)
+        self.inventory_service.mark_changed([product.barcode], "stock", ["quantity"])
+
     def start_sale(self, client_id: str) -> None:
         self.current_sale = Sale(client_id=client_id)
 
@@ -224,23 +500,20 @@ class SaleService:
             raise ValueError("No hay suficiente inventario.")
         item = SaleItem(product=product, quantity=quantity, unit_price=unit_price)
         self.current_sale.add_item(item)
-        product.quantity -= quantity
-        self.inventory_service.repository.save_product(product)
+        self._move_stock(product, quantity)
 
     def remove_item(self, index: int) -> None:
         if not self.current_sale:
             raise ValueError("No hay venta iniciada.")
         item = self.current_sale.items[index]
-        item.product.quantity += item.quantity
         self.current_sale.remove_item(index)
-        self.inventory_service.repository.save_product(item.product)
+        self._move_stock(item.product, -item.quantity)
 
     def cancel_sale(self) -> None:
         if not self.current_sale:
             return
         for item in self.current_sale.items:
-            item.product.quantity += item.quantity
-            self.inventory_service.repository.save_product(item.product)
+            self._move_stock(item.product, -item.quantity)
         self.current_sale = None
 
     def finalize_sale(self) -> float:
@@ -248,8 +521,21 @@ class SaleService:
             raise ValueError("No hay venta iniciada.")
         total = self.current_sale.total()
         timestamp = datetime.now()
-        sale_id = self.repository.save_sale(self.current_sale, timestamp)
-        self.inventory_service.products = self.inventory_service.repository.get_all_products()
+        inventory = self.inventory_service
+        products = {item.product.barcode: item.product for item in self.current_sale.items}
+        sold = {barcode: 0 for barcode in products}
+        for item in self.current_sale.items:
+            sold[item.product.barcode] += item.quantity
+        with self.repository.db.transaction():
+            self.repository.save_sale(self.current_sale, timestamp)
+            if self.deferred_stock:
+                # Stock confirmado menos lo vendido; lo apartado por otros carritos sigue fuera
+                for barcode, product in products.items():
+                    inventory.repository.save_product(product, inventory.committed_quantity(product) - sold[barcode])
+        if self.deferred_stock:
+            for item in self.current_sale.items:
+                inventory.reserve(item.product.barcode, -item.quantity)
+        self.inventory_service.mark_changed([item.product.barcode for item in self.current_sale.items], "sale", ["quantity"])
         self.current_sale = None
         return total
 
@@ -264,4 +550,13 @@ class SaleService:
         return self.current_sale.total()
 
     def get_sales_summary(self, start_date: datetime, end_date: datetime) -> List[dict]:
-        return self.repository.get_sales_summary(start_date, end_date) 
\ No newline at end of file
+        return self.repository.get_sales_summary(start_date, end_date)
+
+    def iter_sales_summary(self, start_date: datetime, end_date: datetime, chunk_size: int = 1000) -> Iterator[SalesSummaryRow]:
+        return self.repository.iter_sales_summary(start_date, end_date, chunk_size)
+
+    def sales_report(self, by: str, start_date: datetime, end_date: datetime, top: Optional[int] = None, order_by: str = "revenue") -> List[ReportRow]:
+        return SalesReports(self.repository.db).sales_report(by, start_date, end_date, top, order_by)
+
+    def daily_report(self, by: str, start_day: date, end_day: date, top: Optional[int] = None, order_by: str = "revenue") -> List[RollupRow]:
+        return SalesReports(self.repository.db).daily_report(by, start_day, end_day, top, order_by) 
\ No newline at end of file
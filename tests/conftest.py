@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(tmp_path, monkeypatch) -> None:
+    """Ejecuta cada prueba en un directorio temporal para no tocar inventory.db."""
+    monkeypatch.chdir(tmp_path)
@@ -0,0 +1,138 @@
+import threading
+import pytest
+
+pytest.importorskip("PySide6")
+
+from src.gui.print_service import FAILED, PENDING, PRINTED, PrintService
+from src.inventory.models import Product, Sale, SaleItem
+
+
+class FakePrinter:
+    """Impresora de prueba que registra cada escritura recibida."""
+    def __init__(self, log: list) -> None:
+        self.log = log
+        self.closed = False
+
+    def write(self, data: bytes) -> None:
+        self.log.append(data)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def _sale() -> Sale:
+    sale = Sale(client_id="cliente")
+    sale.add_item(SaleItem(product=Product(barcode="1", name="Pan"), quantity=2, unit_price=1.5))
+    return sale
+
+
+def _wait_for(service: PrintService, job_id: str, status: str) -> None:
+    done = threading.Event()
+    service.on_status = lambda job: done.set() if job.job_id == job_id and job.status == status else None
+    if any(j.job_id == job_id and j.status == status for j in service.jobs()):
+        return
+    assert done.wait(5)
+
+
+def test_prints_in_background_with_persistent_connection() -> None:
+    """Prueba que la conexión a la impresora se abre una sola vez para varios tickets."""
+    log, opened = [], []
+    service = PrintService(lambda: opened.append(FakePrinter(log)) or opened[-1], base_delay=0)
+    service.start()
+    first = service.submit(_sale(), 3.0)
+    second = service.submit(_sale(), 3.0)
+    _wait_for(service, second, PRINTED)
+    service.stop()
+    assert len(opened) == 1
+    assert len(log) == 2
+    assert {j.job_id for j in service.jobs(PRINTED)} == {first, second}
+
+
+def test_failed_jobs_persist_and_retry() -> None:
+    """Prueba reintentos, backlog persistente y reimpresión al volver la impresora."""
+    log, online = [], False
+
+    def factory():
+        if not online:
+            raise OSError("impresora desconectada")
+        return FakePrinter(log)
+
+    service = PrintService(factory, max_retries=2, base_delay=0)
+    service.start()
+    job_id = service.submit(_sale(), 3.0)
+    _wait_for(service, job_id, FAILED)
+    service.stop()
+    assert service.jobs(FAILED)[0].attempts == 2
+
+    online = True
+    restored = PrintService(factory, base_delay=0)
+    assert [j.job_id for j in restored.jobs(FAILED)] == [job_id]
+    restored.start()
+    restored.retry_failed()
+    _wait_for(restored, job_id, PRINTED)
+    copy_id = restored.reprint(job_id)
+    _wait_for(restored, copy_id, PRINTED)
+    restored.stop()
+    assert len(log) == 2
+    assert restored.jobs(PENDING) == []
+
+
+def test_stop_timeout_leaves_printer_to_worker() -> None:
+    """Prueba que un stop() que vence no cierra la impresora bajo el hilo en uso."""
+    log, opened = [], []
+    release, entered = threading.Event(), threading.Event()
+
+    def slow_factory():
+        entered.set()
+        release.wait(5)
+        opened.append(FakePrinter(log))
+        return opened[-1]
+
+    service = PrintService(slow_factory, base_delay=0)
+    service.start()
+    job_id = service.submit(_sale(), 3.0)
+    assert entered.wait(5)
+    service.stop(timeout=0.05)
+    assert opened == []
+    service.start()
+    release.set()
+    _wait_for(service, job_id, PRINTED)
+    service.stop(timeout=5)
+    assert len(log) == 1
+    assert all(printer.closed for printer in opened)
+
+
+def test_failed_jobs_are_capped() -> None:
+    """Prueba que solo se conservan los últimos keep_failed trabajos fallidos."""
+    def factory():
+        raise OSError("impresora desconectada")
+
+    service = PrintService(factory, max_retries=1, base_delay=0, keep_failed=1)
+    service.start()
+    service.submit(_sale(), 3.0)
+    last = service.submit(_sale(), 3.0)
+    _wait_for(service, last, FAILED)
+    service.stop()
+    assert [j.job_id for j in service.jobs(FAILED)] == [last]
+    assert [j.job_id for j in PrintService(factory).jobs(FAILED)] == [last]
+
+
+def test_backlog_write_does_not_hold_lock() -> None:
+    """Prueba que una escritura lenta del backlog no bloquea la consulta de trabajos."""
+    service = PrintService(lambda: FakePrinter([]))
+    writing, release = threading.Event(), threading.Event()
+    save_backlog = service._save_backlog
+
+    def slow_save(snapshot):
+        writing.set()
+        release.wait(5)
+        save_backlog(snapshot)
+
+    service._save_backlog = slow_save
+    submitter = threading.Thread(target=service.submit, args=(_sale(), 3.0))
+    submitter.start()
+    assert writing.wait(5)
+    assert len(service.jobs(PENDING)) == 1
+    release.set()
+    submitter.join(5)
+    assert len(PrintService(lambda: None).jobs(PENDING)) == 1
@@ -0,0 +1,46 @@
+import socket
+import threading
+import pytest
+
+pytest.importorskip("PySide6")
+
+from src.gui.print_ticket import ESC_FEED_6, GS_CUT, FilePrinter, SocketPrinter, render_ticket, ticket_header, write_ticket
+
+LINES = [("Jamón serrano", 2, 1.5, 3.0), ("Pan", 1, 0.5, 0.5)]
+
+
+def test_render_ticket() -> None:
+    """Prueba que el ticket se renderiza completo con encabezado y pie en caché."""
+    data = render_ticket("cliente", LINES, 3.5)
+    assert data.startswith(ticket_header())
+    assert data.endswith(ESC_FEED_6 + GS_CUT)
+    assert "Jamón serr".encode("cp850") in data
+    assert b"TOTAL:         $3.50" in data
+    assert ticket_header() is ticket_header()
+
+
+def test_ticket_sent_in_single_write(tmp_path) -> None:
+    """Prueba el envío del ticket en una sola escritura a archivo y a socket."""
+    path = tmp_path / "ticket.bin"
+    printer = FilePrinter(str(path))
+    write_ticket(printer, "cliente", LINES, 3.5)
+    printer.close()
+    assert path.read_bytes() == render_ticket("cliente", LINES, 3.5)
+
+    server = socket.create_server(("127.0.0.1", 0))
+    received = []
+
+    def accept() -> None:
+        conn, _ = server.accept()
+        with conn:
+            while chunk := conn.recv(4096):
+                received.append(chunk)
+
+    thread = threading.Thread(target=accept)
+    thread.start()
+    printer = SocketPrinter("127.0.0.1", server.getsockname()[1])
+    write_ticket(printer, "cliente", LINES, 3.5)
+    printer.close()
+    thread.join(5)
+    server.close()
+    assert b"".join(received) == render_ticket("cliente", LINES, 3.5)
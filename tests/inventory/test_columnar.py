@@ -0,0 +1,55 @@
+from src.inventory.columnar import ColumnarCatalog, InventoryValue
+from src.inventory.models import Product
+from src.inventory.services import InventoryService, SaleService
+
+
+def _service() -> InventoryService:
+    service = InventoryService()
+    service.add_product(Product(barcode="1", name="Pan", purchase_price=1.0, retail_price=2.0, wholesale_price=1.5, quantity=10))
+    service.add_product(Product(barcode="2", name="Leche", purchase_price=3.0, retail_price=4.0, wholesale_price=3.5, quantity=2))
+    return service
+
+
+def test_columnar_aggregates() -> None:
+    """Prueba los agregados vectorizados sobre la réplica columnar."""
+    catalog = ColumnarCatalog(_service())
+    assert catalog.inventory_value() == InventoryValue(purchase=16.0, retail=28.0, wholesale=22.0)
+    assert catalog.margins().tolist() == [0.5, 0.25]
+    counts, edges = catalog.margin_distribution(bins=2, value_range=(0.0, 1.0))
+    assert counts.tolist() == [1, 1] and edges.tolist() == [0.0, 0.5, 1.0]
+    assert catalog.below_threshold(5) == ["2"]
+
+
+def test_columnar_follows_service_changes() -> None:
+    """Prueba que la réplica sigue las altas, ediciones, reposiciones, ventas y recargas."""
+    service = _service()
+    catalog = ColumnarCatalog(service, capacity=1)
+    arrays = catalog._quantity
+    catalog.rebuild()
+    assert catalog._quantity is arrays
+    service.add_product(Product(barcode="3", name="Café", purchase_price=5.0, retail_price=8.0, quantity=1))
+    service.refill_product("2", 8)
+    service.edit_product("1", retail_price=3.0)
+    sales = SaleService(service)
+    sales.start_sale("ana")
+    sales.add_item("3", 1, 8.0)
+    assert catalog.index["3"] == 2
+    assert catalog.quantities.tolist() == [10, 10, 0]
+    assert catalog.retail_prices.tolist() == [3.0, 4.0, 8.0]
+    assert catalog.below_threshold(1) == ["3"]
+    service.repository.conn.execute("UPDATE products SET quantity = 7 WHERE barcode = '1'")
+    service.repository.conn.commit()
+    service.reload()
+    assert catalog.quantities.tolist() == [7, 10, 0]
+    catalog.close()
+    service.refill_product("1", 1)
+    assert catalog.quantities[0] == 7
+
+
+def test_columnar_grows_from_zero_capacity() -> None:
+    """Prueba que una réplica vacía sin capacidad inicial crece al agregar productos."""
+    service = InventoryService()
+    catalog = ColumnarCatalog(service, capacity=0)
+    for i in range(3):
+        service.add_product(Product(barcode=str(i), name=f"P{i}", quantity=i))
+    assert catalog.quantities.tolist() == [0, 1, 2]
@@ -0,0 +1,41 @@
+import pytest
+from src.inventory.database import Database
+from src.inventory.models import Product
+from src.inventory.services import InventoryRepository, InventoryService, SaleService
+
+
+def test_repositories_share_connection() -> None:
+    """Prueba que inventario y ventas usan la misma conexión."""
+    service = InventoryService()
+    sales = SaleService(service)
+    assert sales.repository.db is service.repository.db
+    assert sales.repository.conn is service.repository.conn
+
+
+def test_transaction_groups_commits() -> None:
+    """Prueba que varias escrituras dentro de una transacción se confirman juntas."""
+    db = Database()
+    repo = InventoryRepository(db=db)
+    with db.transaction():
+        repo.save_product(Product(barcode="1", name="Pan"))
+        repo.save_product(Product(barcode="2", name="Leche"))
+        assert InventoryRepository().get_all_products() == []
+    assert len(InventoryRepository().get_all_products()) == 2
+
+
+def test_transaction_rollback() -> None:
+    """Prueba que un error deshace solo el bloque donde ocurrió."""
+    db = Database()
+    repo = InventoryRepository(db=db)
+    with db.transaction():
+        repo.save_product(Product(barcode="1", name="Pan"))
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                repo.save_product(Product(barcode="2", name="Leche"))
+                raise RuntimeError("falla")
+    assert [p.barcode for p in InventoryRepository().get_all_products()] == ["1"]
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            repo.save_product(Product(barcode="3", name="Café"))
+            raise RuntimeError("falla")
+    assert [p.barcode for p in InventoryRepository().get_all_products()] == ["1"]
@@ -0,0 +1,78 @@
+import csv
+import os
+import zipfile
+from datetime import datetime
+from xml.etree import ElementTree
+from src.inventory.export import export_sales_summary_csv, export_summary
+from src.inventory.models import Product
+from src.inventory.services import InventoryService, SaleRepository, SaleService
+
+
+def _make_sales(count: int) -> SaleService:
+    service = InventoryService()
+    service.add_product(Product(barcode="1", name="Pan", quantity=1000))
+    sales = SaleService(service)
+    for i in range(count):
+        sales.start_sale(f"cliente-{i}")
+        sales.add_item("1", 2, 1.5)
+        sales.finalize_sale()
+    return sales
+
+
+def test_iter_sales_summary_matches_list() -> None:
+    """Prueba que la versión por bloques entrega las mismas filas que get_sales_summary."""
+    sales = _make_sales(7)
+    start, end = datetime(2000, 1, 1), datetime(2100, 1, 1)
+    rows = list(sales.iter_sales_summary(start, end, chunk_size=3))
+    assert len(rows) == 7
+    assert rows[0].total == 3.0
+    assert [row._asdict() for row in rows] == sales.get_sales_summary(start, end)
+
+
+def test_export_sales_summary_csv(tmp_path) -> None:
+    """Prueba la exportación del resumen de ventas a CSV."""
+    sales = _make_sales(3)
+    path = tmp_path / "ventas.csv"
+    count = export_sales_summary_csv(sales.repository, datetime(2000, 1, 1), datetime(2100, 1, 1), str(path), chunk_size=2)
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert count == 3
+    assert rows[0] == ["sale_id", "client_id", "timestamp", "product_barcode", "quantity", "unit_price", "total"]
+    assert rows[1][1] == "cliente-0"
+
+
+def test_export_summary_xlsx_and_csv(tmp_path) -> None:
+    """Prueba la exportación en streaming a .xlsx válido y a archivos CSV reales."""
+    _make_sales(3)
+    progress = []
+    paths = export_summary("inventory.db", datetime(2000, 1, 1), datetime(2100, 1, 1), str(tmp_path / "resumen"), progress.append)
+    assert paths == [str(tmp_path / "resumen.xlsx")]
+    assert progress[-1] == 4
+    ns = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+    with zipfile.ZipFile(paths[0]) as zf:
+        workbook = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+        assert [s.get("name") for s in workbook.iter(f"{{{ns['m']}}}sheet")] == ["Inventario", "Ventas"]
+        sheet = ElementTree.fromstring(zf.read("xl/worksheets/sheet1.xml"))
+        rows = sheet.findall(".//m:row", ns)
+        assert len(rows) == 2
+        assert rows[1].find("m:c/m:is/m:t", ns).text == "1"
+
+    paths = export_summary("inventory.db", datetime(2000, 1, 1), datetime(2100, 1, 1), str(tmp_path / "resumen.csv"))
+    assert [os.path.basename(p) for p in paths] == ["resumen_inventario.csv", "resumen_ventas.csv"]
+    with open(paths[1], newline="", encoding="utf-8") as f:
+        assert len(list(csv.reader(f))) == 4
+
+
+def test_sale_commits_while_export_is_open() -> None:
+    """Prueba que una venta se confirma mientras un export mantiene su cursor abierto."""
+    sales = _make_sales(3)
+    reader = SaleRepository()
+    rows = reader.iter_sales_summary(datetime(2000, 1, 1), datetime(2100, 1, 1), chunk_size=1)
+    first = next(rows)
+    sales.start_sale("cliente-nuevo")
+    sales.add_item("1", 1, 1.5)
+    sales.finalize_sale()
+    # El export sigue leyendo la instantánea en la que empezó
+    exported = [row._asdict() for row in [first, *rows]]
+    assert exported == sales.get_sales_summary(datetime(2000, 1, 1), datetime(2100, 1, 1))[:3]
+    reader.db.close()
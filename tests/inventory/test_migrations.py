@@ -0,0 +1,90 @@
+import sqlite3
+import threading
+from datetime import datetime
+from src.inventory.database import Database
+from src.inventory.migrations import MIGRATIONS, explain_query_plan, schema_version
+from src.inventory.services import InventoryRepository
+
+
+def test_upgrade_existing_database(tmp_path) -> None:
+    """Prueba que una base creada sin versión se actualiza conservando sus datos."""
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE products (barcode TEXT PRIMARY KEY, name TEXT, description TEXT, purchase_price REAL, retail_price REAL, wholesale_price REAL, quantity INTEGER)')
+    conn.execute("INSERT INTO products VALUES ('1', 'Pan', NULL, 1.0, 2.0, 1.5, 4)")
+    conn.commit()
+    conn.close()
+    db = Database(path)
+    assert db.schema_version == len(MIGRATIONS)
+    assert db.conn.execute('SELECT name FROM products').fetchall() == [('Pan',)]
+    assert [p.barcode for p in InventoryRepository(db=db).get_products_by_name("PAN")] == ["1"]
+    # Volver a abrir no reaplica migraciones
+    assert schema_version(Database(path).conn) == len(MIGRATIONS)
+
+
+def test_backfill_initial_price_history(tmp_path) -> None:
+    """Prueba que los productos sin historial reciben sus precios desde su primera venta."""
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE products (barcode TEXT PRIMARY KEY, name TEXT, description TEXT, purchase_price REAL, retail_price REAL, wholesale_price REAL, quantity INTEGER)')
+    conn.execute('CREATE TABLE price_history (id INTEGER PRIMARY KEY AUTOINCREMENT, product_barcode TEXT, retail_price REAL, wholesale_price REAL, timestamp TEXT)')
+    conn.execute('CREATE TABLE sales (id INTEGER PRIMARY KEY AUTOINCREMENT, client_id TEXT, timestamp TEXT)')
+    conn.execute('CREATE TABLE sale_items (id INTEGER PRIMARY KEY AUTOINCREMENT, sale_id INTEGER, product_barcode TEXT, quantity INTEGER, unit_price REAL)')
+    conn.execute("INSERT INTO products VALUES ('1', 'Pan', NULL, 1.0, 2.0, 1.5, 4)")
+    conn.execute("INSERT INTO products VALUES ('2', 'Leche', NULL, 1.0, 3.0, 2.5, 4)")
+    conn.execute("INSERT INTO price_history (product_barcode, retail_price, wholesale_price, timestamp) VALUES ('2', 3.0, 2.5, '2024-03-01T00:00:00')")
+    conn.execute("INSERT INTO sales VALUES (1, 'ana', '2024-01-15T10:00:00')")
+    conn.execute("INSERT INTO sale_items (sale_id, product_barcode, quantity, unit_price) VALUES (1, '1', 1, 2.0)")
+    conn.commit()
+    conn.close()
+    repo = InventoryRepository(db=Database(path))
+    assert repo.get_price_at("1", datetime(2024, 1, 15, 10)).retail_price == 2.0
+    assert repo.get_price_at("1", datetime(2024, 1, 1)) is None
+    assert len(repo.get_price_history("2")) == 1
+def test_concurrent_migration(tmp_path) -> None:
+    """Prueba que dos conexiones que abren la misma base a la vez no repiten pasos."""
+    path = str(tmp_path / "shared.db")
+    sqlite3.connect(path).close()
+    barrier = threading.Barrier(4)
+    versions, errors = [], []
+
+    def open_db() -> None:
+        barrier.wait()
+        try:
+            versions.append(Database(path).schema_version)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_db) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert versions == [len(MIGRATIONS)] * 4
+
+
+def test_hot_queries_use_indexes() -> None:
+    """Prueba con EXPLAIN QUERY PLAN que las consultas frecuentes usan índices."""
+    conn = Database().conn
+    plan = explain_query_plan(conn, 'SELECT retail_price FROM price_history WHERE product_barcode = ? ORDER BY timestamp DESC', ('1',))
+    assert any('idx_price_history_barcode_ts' in step for step in plan)
+    plan = explain_query_plan(conn, '''SELECT s.id, si.quantity FROM sales s
+                                       JOIN sale_items si ON s.id = si.sale_id
+                                       WHERE s.timestamp BETWEEN ? AND ?''', ('a', 'b'))
+    assert any('idx_sales_timestamp' in step for step in plan)
+    assert any('idx_sale_items_sale_id' in step for step in plan)
+    plan = explain_query_plan(conn, 'SELECT barcode FROM products WHERE search_key >= ? AND search_key < ?', ('caf', 'cag'))
+    assert any('idx_products_search_key' in step for step in plan)
+    plan = explain_query_plan(conn, 'SELECT barcode FROM products WHERE (quantity, barcode) > (?, ?) ORDER BY quantity, barcode LIMIT 10', (1, 'a'))
+    assert any('idx_products_quantity_barcode' in step for step in plan)
+    assert not any('TEMP B-TREE' in step for step in plan)
+
+
+def test_price_as_of_uses_index() -> None:
+    """Prueba que la consulta de precio vigente lee el índice (barcode, timestamp)."""
+    conn = Database().conn
+    plan = explain_query_plan(conn, '''SELECT retail_price FROM price_history
+        WHERE product_barcode = ? AND timestamp <= ? ORDER BY timestamp DESC LIMIT 1''', ('1', '2024-01-01'))
+    assert any('idx_price_history_barcode_ts' in step for step in plan)
+    assert not any('TEMP B-TREE' in step for step in plan)
@@ -0,0 +1,31 @@
+import pytest
+from datetime import datetime
+from src.inventory.models import EMPTY_HISTORY, Product, ProductPriceHistory, Sale, SaleItem
+
+
+def test_models_are_slotted() -> None:
+    """Prueba que los modelos no llevan __dict__ y conservan el comportamiento de dataclass."""
+    product = Product(barcode="1", name="Pan", retail_price=1.5)
+    history = ProductPriceHistory("1", 1.5, 1.2, datetime(2024, 1, 1))
+    item = SaleItem(product, 2, 1.5)
+    sale = Sale(client_id="ana", items=[item])
+    for obj in (product, history, item, sale):
+        assert not hasattr(obj, "__dict__")
+    assert product == Product(barcode="1", name="Pan", retail_price=1.5)
+    assert "Pan" in repr(product)
+    assert sale.total() == 3.0
+    assert product.latest_price_change() is None
+    with pytest.raises(AttributeError):
+        product.color = "rojo"
+
+
+def test_shared_empty_history() -> None:
+    """Prueba que los productos sin historial comparten una lista vacía de solo lectura."""
+    a, b = Product(barcode="1", name="A"), Product(barcode="2", name="B")
+    assert a.price_history is b.price_history is EMPTY_HISTORY
+    assert a.price_history == []
+    with pytest.raises(TypeError):
+        a.price_history.append(ProductPriceHistory("1", 1.0, 1.0, datetime(2024, 1, 1)))
+    a.update(retail_price=2.0)
+    assert [h.retail_price for h in a.price_history] == [2.0]
+    assert b.price_history == [] and EMPTY_HISTORY == []
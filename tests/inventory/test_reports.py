@@ -0,0 +1,89 @@
+from datetime import datetime
+import pytest
+from src.inventory.migrations import LOW_STOCK_CONDITION, explain_query_plan
+from src.inventory.reports import LowStockRow, SalesReports, low_stock_report
+from src.inventory.models import Product, Sale, SaleItem
+from src.inventory.services import InventoryService, SaleService
+
+START, END = datetime(2024, 1, 1), datetime(2024, 12, 31)
+
+
+def _sales() -> SaleService:
+    service = InventoryService()
+    service.add_product(Product(barcode="1", name="Pan", purchase_price=1.0, quantity=100))
+    service.add_product(Product(barcode="2", name="Leche", purchase_price=2.0, quantity=100))
+    sales = SaleService(service)
+    pan, leche = service.get_product_by_barcode("1"), service.get_product_by_barcode("2")
+    for client, when, items in [
+        ("ana", datetime(2024, 3, 1, 9, 30), [(pan, 2, 1.5), (leche, 1, 3.0)]),
+        ("ana", datetime(2024, 3, 1, 18, 0), [(pan, 1, 1.5)]),
+        ("luis", datetime(2024, 3, 2, 9, 10), [(leche, 4, 2.5)]),
+    ]:
+        sale = Sale(client_id=client, items=[SaleItem(p, q, price) for p, q, price in items])
+        sales.repository.save_sale(sale, when)
+    return sales
+
+
+def test_sales_report_by_dimension() -> None:
+    """Prueba los reportes agregados por producto, día, hora y cliente."""
+    sales = _sales()
+    by_product = sales.sales_report("product", START, END)
+    assert [(r.key, r.units, r.revenue, r.cost, r.margin, r.sales) for r in by_product] == [
+        ("1", 3, 4.5, 3.0, 1.5, 2),
+        ("2", 5, 13.0, 10.0, 3.0, 2),
+    ]
+    assert [(r.key, r.revenue) for r in sales.sales_report("day", START, END)] == [("2024-03-01", 7.5), ("2024-03-02", 10.0)]
+    assert [(r.key, r.sales) for r in sales.sales_report("hour", START, END)] == [("09", 2), ("18", 1)]
+    assert [r.key for r in sales.sales_report("client", START, END, top=1)] == ["luis"]
+    assert [r.key for r in sales.sales_report("product", START, END, top=1, order_by="units")] == ["2"]
+    with pytest.raises(ValueError):
+        sales.sales_report("week", START, END)
+
+
+def test_sales_report_uses_indexes() -> None:
+    """Prueba que la agregación filtra por fecha con el índice de ventas."""
+    sales = _sales()
+    plan = explain_query_plan(sales.repository.conn, '''SELECT si.product_barcode, SUM(si.quantity)
+        FROM sales s JOIN sale_items si ON s.id = si.sale_id
+        WHERE s.timestamp BETWEEN ? AND ? GROUP BY si.product_barcode''', ("a", "b"))
+    assert any("idx_sales_timestamp" in step for step in plan)
+    assert any("idx_sale_items_sale_id" in step for step in plan)
+
+
+def test_daily_rollup_matches_sales() -> None:
+    """Prueba que la tabla resumen diaria se actualiza con cada venta y coincide con el detalle."""
+    sales = _sales()
+    by_day = sales.daily_report("day", START, END)
+    assert [(r.key, r.units, r.revenue) for r in by_day] == [("2024-03-01", 4, 7.5), ("2024-03-02", 4, 10.0)]
+    by_product = sales.daily_report("product", START, END)
+    detail = sales.sales_report("product", START, END)
+    assert [(r.key, r.units, r.revenue, r.cost, r.margin) for r in by_product] == [
+        (r.key, r.units, r.revenue, r.cost, r.margin) for r in detail]
+    assert [r.key for r in sales.daily_report("product", START, END, top=1, order_by="margin")] == ["2"]
+    assert sales.daily_report("day", datetime(2024, 3, 2), datetime(2024, 3, 2))[0].units == 4
+
+
+def test_rebuild_daily_rollup() -> None:
+    """Prueba la reconstrucción de la tabla resumen para bases existentes."""
+    sales = _sales()
+    conn = sales.repository.conn
+    conn.execute('DELETE FROM daily_product_sales')
+    conn.commit()
+    assert sales.daily_report("day", START, END) == []
+    assert SalesReports(sales.repository.db).rebuild_daily_rollup() == 3
+    assert [r.revenue for r in sales.daily_report("day", START, END)] == [7.5, 10.0]
+
+
+def test_low_stock_report() -> None:
+    """Prueba el reporte de productos por reponer y que use el índice parcial."""
+    service = InventoryService()
+    service.add_product(Product(barcode="1", name="Pan", quantity=1, reorder_point=5))
+    service.add_product(Product(barcode="2", name="Leche", quantity=3, reorder_point=4))
+    service.add_product(Product(barcode="3", name="Café", quantity=9, reorder_point=4))
+    service.add_product(Product(barcode="4", name="Sal", quantity=0))
+    assert low_stock_report(service.repository.db) == [
+        LowStockRow("1", "Pan", 1, 5, 4),
+        LowStockRow("2", "Leche", 3, 4, 1),
+    ]
+    plan = explain_query_plan(service.repository.conn, f"SELECT barcode FROM products WHERE {LOW_STOCK_CONDITION}")
+    assert any("idx_products_low_stock" in step for step in plan)
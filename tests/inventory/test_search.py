@@ -0,0 +1,73 @@
+import threading
+from src.inventory.models import Product
+from src.inventory.search import ProductSearcher, normalize_search_key
+from src.inventory.services import InventoryRepository
+
+
+def test_normalize_search_key() -> None:
+    """Prueba la normalización de nombres con acentos, eñes y espacios."""
+    assert normalize_search_key("  Jamón   SERRANO ") == "jamon serrano"
+    assert normalize_search_key("Piña") == "pina"
+    assert normalize_search_key(None) == ""
+
+
+def test_searcher_delivers_latest_query() -> None:
+    """Prueba que solo se entregan resultados de la consulta más reciente."""
+    repo = InventoryRepository()
+    repo.save_product(Product(barcode="1", name="Café"))
+    repo.save_product(Product(barcode="2", name="Jamón"))
+    delivered = []
+    done = threading.Event()
+
+    def on_results(generation, text, products):
+        delivered.append((generation, text, [p.barcode for p in products]))
+        if text == "jam":
+            done.set()
+
+    searcher = ProductSearcher(lambda: InventoryRepository(lazy_history=True), on_results)
+    searcher.submit("c")
+    searcher.submit("ca")
+    last = searcher.submit("jam")
+    assert done.wait(5)
+    searcher.close()
+    assert delivered[-1] == (last, "jam", ["2"])
+    assert all(barcodes == ["1"] for _, text, barcodes in delivered[:-1])
+
+
+def test_searcher_reports_errors() -> None:
+    """Prueba que los errores distintos de la interrupción llegan a on_error."""
+    def broken_repository():
+        repository = InventoryRepository(lazy_history=True)
+        repository.conn.execute("DROP TABLE products")
+        return repository
+
+    errors = []
+    done = threading.Event()
+
+    def on_error(generation, text, message):
+        errors.append((generation, text, message))
+        done.set()
+
+    searcher = ProductSearcher(broken_repository, lambda *args: None, on_error=on_error)
+    generation = searcher.submit("pan")
+    assert done.wait(5)
+    searcher.close()
+    assert errors == [(generation, "pan", errors[0][2])]
+    assert "no such table" in errors[0][2]
+
+
+
+def test_stock_saves_do_not_reindex() -> None:
+    """Prueba que guardar solo el stock no reescribe la fila del índice de búsqueda."""
+    repo = InventoryRepository()
+    product = Product(barcode="1", name="Pan")
+    repo.save_product(product)
+    before = repo.conn.total_changes
+    for quantity in range(5):
+        product.quantity = quantity
+        repo.save_product(product)
+    # Solo las 5 filas de products; el trigger FTS habría sumado más cambios
+    assert repo.conn.total_changes - before == 5
+    product.name = "Pan integral"
+    repo.save_product(product)
+    assert [p.barcode for p in repo.get_products_by_name("integral")] == ["1"]
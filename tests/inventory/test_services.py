@@ -1,6 +1,7 @@
 import pytest
-from src.inventory.models import Product
-from src.inventory.services import InventoryService
+from datetime import datetime, timedelta
+from src.inventory.models import Product, ProductPriceHistory
+from src.inventory.services import InventoryRepository, InventoryService, SaleService
 
 def test_add_and_get_product() -> None:
     """Prueba agregar y obtener un producto."""
@@ -52,4 +53,310 @@ def test_get_inventory_table() -> None:
     table = service.get_inventory_table()
     assert isinstance(table, list)
     assert any(row["barcode"] == "1" for row in table)
-    assert any(row["barcode"] == "2" for row in table) 
\ No newline at end of file
+    assert any(row["barcode"] == "2" for row in table) 
+def test_get_all_products_constant_queries() -> None:
+    """Prueba que la carga del catálogo no hace una consulta por producto."""
+    repo = InventoryRepository()
+    for i in range(20):
+        repo.save_product(Product(barcode=str(i), name=f"P{i}"))
+    repo.save_price_history(ProductPriceHistory("1", 2.0, 1.5, datetime(2024, 1, 1)))
+    repo.save_price_history(ProductPriceHistory("1", 3.0, 2.5, datetime(2024, 2, 1)))
+    products = repo.get_all_products()
+    assert len(products) == 20
+    assert repo.last_load_query_count == 2
+    history = next(p for p in products if p.barcode == "1").price_history
+    assert [h.retail_price for h in history] == [3.0, 2.0]
+    assert next(p for p in products if p.barcode == "2").price_history == []
+
+def test_lazy_price_history() -> None:
+    """Prueba que el historial se carga solo al leerlo en modo perezoso."""
+    repo = InventoryRepository()
+    repo.save_product(Product(barcode="1", name="Café"))
+    repo.save_price_history(ProductPriceHistory("1", 2.0, 1.5, datetime(2024, 1, 1)))
+    repo.save_price_history(ProductPriceHistory("1", 3.0, 2.5, datetime(2024, 2, 1)))
+    lazy_repo = InventoryRepository(lazy_history=True)
+    product = lazy_repo.get_all_products()[0]
+    assert lazy_repo.last_load_query_count == 1
+    # repr() (p. ej. en logs) no debe cargar el historial
+    assert "Café" in repr(product)
+    assert lazy_repo.query_count == 1 and not product.history_loaded()
+    assert product.latest_price_change().retail_price == 3.0
+    assert [h.retail_price for h in product.price_history] == [3.0, 2.0]
+    queries = lazy_repo.query_count
+    assert product.price_history[0] is product.latest_price_change()
+    assert lazy_repo.query_count == queries
+
+def test_identity_map_shared_with_sales() -> None:
+    """Prueba que ventas e inventario comparten las mismas instancias de producto."""
+    service = InventoryService()
+    service.add_product(Product(barcode="1", name="Pan", quantity=10))
+    product = service.get_product_by_barcode("1")
+    sales = SaleService(service)
+    sales.start_sale("cliente")
+    sales.add_item("1", 3, 1.0)
+    sales.finalize_sale()
+    assert service.get_product_by_barcode("1") is product
+    assert product.quantity == 7
+    assert service.products[0] is product
+    assert InventoryService().get_product_by_barcode("1").quantity == 7
+
+def test_changes_do_not_reload_catalog() -> None:
+    """Prueba que refill, edición y venta solo actualizan los productos afectados."""
+    service = InventoryService()
+    service.add_product(Product(barcode="1", name="Pan", quantity=10))
+    service.add_product(Product(barcode="2", name="Leche", quantity=5))
+    queries = service.repository.query_count
+    service.refill_product("1", 5)
+    assert service.last_changed == ["1"]
+    service.edit_product("2", retail_price=3.0)
+    assert service.last_changed == ["2"]
+    # Precios iniciales del alta más el cambio
+    assert len(service.get_product_by_barcode("2").price_history) == 2
+    sales = SaleService(service)
+    sales.start_sale("cliente")
+    sales.add_item("1", 2, 1.0)
+    sales.finalize_sale()
+    assert service.last_changed == ["1"]
+    # Solo escrituras: ninguna lectura del catálogo
+    assert service.repository.query_count - queries == 4
+
+def test_deferred_stock_checkout() -> None:
+    """Prueba que el inventario se escribe junto con la venta en una sola transacción."""
+    service = InventoryService()
+    service.add_product(Product(barcode="1", name="Pan", quantity=10))
+    sales = SaleService(service, deferred_stock=True)
+    assert sales.repository.conn is service.repository.conn
+    sales.start_sale("cliente")
+    sales.add_item("1", 3, 1.0)
+    sales.add_item("1", 2, 1.0)
+    assert service.get_product_by_barcode("1").quantity == 5
+    assert InventoryRepository().get_product_by_barcode("1").quantity == 10
+    sales.finalize_sale()
+    assert InventoryRepository().get_product_by_barcode("1").quantity == 5
+    assert len(sales.get_sales_summary(datetime(2000, 1, 1), datetime(2100, 1, 1))) == 2
+
+def test_deferred_stock_refill_during_open_cart() -> None:
+    """Prueba que un refill con el carrito abierto no descuenta la venta dos veces."""
+    service = InventoryService()
+    service.add_product(Product(barcode="1", name="Pan", quantity=10))
+    sales = SaleService(service, deferred_stock=True)
+    sales.start_sale("cliente")
+    sales.add_item("1", 3, 1.0)
+    service.refill_product("1", 5)
+    sales.finalize_sale()
+    assert service.get_product_by_barcode("1").quantity == 12
+    assert InventoryRepository().get_product_by_barcode("1").quantity == 12
+
+def test_deferred_stock_remove_item_then_abandon() -> None:
+    """Prueba que el carrito no toca la base si la venta nunca se finaliza."""
+    service = InventoryService()
+    service.add_product(Product(barcode="1", name="Pan", quantity=10))
+    sales = SaleService(service, deferred_stock=True)
+    sales.start_sale("cliente")
+    sales.add_item("1", 3, 1.0)
+    sales.add_item("1", 2, 1.0)
+    sales.remove_item(0)
+    service.refill_product("1", 1)
+    # Cierre abrupto: sin finalizar ni cancelar la venta
+    assert service.get_product_by_barcode("1").quantity == 9
+    assert InventoryRepository().get_product_by_barcode("1").quantity == 11
+    assert sales.repository.conn.execute('SELECT COUNT(*) FROM sales').fetchone()[0] == 0
+    service.reload()
+    assert service.get_product_by_barcode("1").quantity == 9
+    sales.finalize_sale()
+    assert service.reserved == {}
+    assert InventoryRepository().get_product_by_barcode("1").quantity == 9
+
+def test_deferred_stock_cancel_after_edit() -> None:
+    """Prueba que cancelar tras una edición devuelve el stock también en la base."""
+    service = InventoryService()
+    service.add_product(Product(barcode="1", name="Pan", quantity=10))
+    service.add_product(Product(barcode="2", name="Leche", quantity=10))
+    sales = SaleService(service, deferred_stock=True)
+    sales.start_sale("cliente")
+    sales.add_item("1", 2, 1.0)
+    sales.add_item("2", 4, 1.0)
+    service.edit_product("1", name="Pan integral")
+    service.edit_product("2", name="Leche entera")
+    sales.remove_item(1)
+    sales.cancel_sale()
+    repo = InventoryRepository()
+    assert service.get_product_by_barcode("1").quantity == repo.get_product_by_barcode("1").quantity == 10
+    assert service.get_product_by_barcode("2").quantity == repo.get_product_by_barcode("2").quantity == 10
+
+def test_search_products_by_name() -> None:
+    """Prueba la búsqueda por prefijos ordenada por relevancia."""
+    service = InventoryService()
+    service.add_product(Product(barcode="1", name="Galletas", description="sabor a coco"))
+    service.add_product(Product(barcode="2", name="Coca Cola", description="350 ml"))
+    service.add_product(Product(barcode="3", name="Agua"))
+    assert [p.barcode for p in service.get_products_by_name("co")] == ["2", "1"]
+    assert service.get_products_by_name("coca cola", limit=1)[0] is service.get_product_by_barcode("2")
+    service.edit_product("3", name="Agua de coco")
+    assert [p.barcode for p in service.get_products_by_name("coco")][0] == "3"
+    assert service.get_products_by_name("agu") == [service.get_product_by_barcode("3")]
+    assert service.get_products_by_name('"') == []
+
+def test_search_ignores_accents_and_case() -> None:
+    """Prueba que las búsquedas sin acentos encuentran nombres acentuados."""
+    service = InventoryService()
+    service.add_product(Product(barcode="1", name="Café molido"))
+    service.add_product(Product(barcode="2", name="Jamón serrano"))
+    service.add_product(Product(barcode="3", name="Jugo de Piña"))
+    service.add_product(Product(barcode="4", name="Pan", description="acompaña el jamón"))
+    assert [p.barcode for p in service.get_products_by_name("cafe")] == ["1"]
+    assert [p.barcode for p in service.get_products_by_name("JAMON")] == ["2", "4"]
+    assert [p.barcode for p in service.get_products_by_name("pina")] == ["3"]
+    assert [p.barcode for p in service.get_products_by_name("jamon ser")] == ["2"]
+
+def test_change_events() -> None:
+    """Prueba que cada operación publica los códigos y campos modificados."""
+    service = InventoryService()
+    events = []
+    service.subscribe(events.append)
+    service.add_product(Product(barcode="1", name="Pan", quantity=10))
+    service.refill_product("1", 5)
+    service.edit_product("1", name="Pan integral", retail_price=2.0)
+    sales = SaleService(service)
+    sales.start_sale("cliente")
+    sales.add_item("1", 2, 2.0)
+    sales.finalize_sale()
+    assert [(e.kind, e.barcodes, e.fields) for e in events] == [
+        ("add", ["1"], None),
+        ("refill", ["1"], ["quantity"]),
+        ("edit", ["1"], ["name", "retail_price"]),
+        ("stock", ["1"], ["quantity"]),
+        ("sale", ["1"], ["quantity"]),
+    ]
+    service.unsubscribe(events.append)
+    service.refill_product("1", 1)
+    assert len(events) == 5
+
+def test_list_products_keyset_pagination() -> None:
+    """Prueba el listado paginado por cursor con distintos órdenes y filtros."""
+    repo = InventoryRepository()
+    for i in range(25):
+        repo.save_product(Product(barcode=f"{i:03d}", name=f"Producto {i % 5}", quantity=i % 7))
+    for sort_by in ("barcode", "name", "quantity"):
+        pages = list(repo.iter_product_pages(sort_by, page_size=10))
+        assert [len(page.products) for page in pages] == [10, 10, 5]
+        listed = [(getattr(p, sort_by), p.barcode) for page in pages for p in page.products]
+        assert listed == sorted(listed)
+    page = repo.list_products("quantity", limit=100, min_quantity=2, max_quantity=3)
+    assert {p.quantity for p in page.products} == {2, 3}
+    assert page.next_cursor is None
+    page = repo.list_products("name", limit=100, name_prefix="producto 4")
+    assert len(page.products) == 5
+    # Prefijos que quedan vacíos al normalizarlos no filtran
+    for blank in ("  ", "\u0301"):
+        assert len(repo.list_products("name", limit=100, name_prefix=blank).products) == 25
+    with pytest.raises(ValueError):
+        repo.list_products("price")
+
+def test_progressive_catalog_loading() -> None:
+    """Prueba la carga del catálogo por páginas desde otro repositorio."""
+    repo = InventoryRepository()
+    for i in range(5):
+        repo.save_product(Product(barcode=str(i), name=f"P{i}"))
+    repo.save_price_history(ProductPriceHistory("0", 2.0, 1.5, datetime(2024, 1, 1)))
+    service = InventoryService(InventoryRepository(lazy_history=True), autoload=False)
+    events = []
+    service.subscribe(events.append)
+    assert service.products == [] and not service.loaded
+    loader_repo = InventoryRepository(lazy_history=True)
+    for page in loader_repo.iter_product_pages(page_size=2):
+        service.extend_catalog(page.products)
+    service.finish_loading()
+    assert service.loaded
+    assert [e.kind for e in events] == ["load"] * 3
+    assert [p.barcode for p in service.products] == ["0", "1", "2", "3", "4"]
+    queries = loader_repo.query_count
+    assert service.get_product_by_barcode("0").price_history[0].retail_price == 2.0
+    assert loader_repo.query_count == queries
+
+def test_low_stock_watch_list() -> None:
+    """Prueba que la lista de vigilancia sigue a ventas, reposiciones y ediciones."""
+    service = InventoryService()
+    service.add_product(Product(barcode="1", name="Pan", quantity=5, reorder_point=3))
+    service.add_product(Product(barcode="2", name="Leche", quantity=1))
+    service.add_product(Product(barcode="3", name="Café", quantity=2, reorder_point=2))
+    assert list(service.low_stock) == ["3"]
+    events = []
+    service.subscribe(events.append)
+    sales = SaleService(service)
+    sales.start_sale("ana")
+    sales.add_item("1", 2, 1.0)
+    assert [p.barcode for p in service.get_low_stock_products()] == ["1", "3"]
+    assert [(e.kind, e.barcodes) for e in events][-1] == ("low_stock", ["1"])
+    sales.finalize_sale()
+    assert [e.kind for e in events][-1] == "sale"
+    service.refill_product("3", 5)
+    service.set_reorder_point("2", 1)
+    assert set(service.low_stock) == {"1", "2"}
+    with pytest.raises(ValueError):
+        service.set_reorder_point("2", -1)
+    with pytest.raises(ValueError):
+        service.edit_product("2", reorder_point=-1)
+    with pytest.raises(ValueError):
+        service.add_product(Product(barcode="4", name="Sal", reorder_point=-1))
+    assert service.get_product_by_barcode("2").reorder_point == 1
+    assert service.get_product_by_barcode("4") is None
+    assert [p.barcode for p in service.repository.get_low_stock_products()] == ["1", "2"]
+    service.reload()
+    assert set(service.low_stock) == {"1", "2"}
+
+def test_low_stock_summary_after_loading() -> None:
+    """Prueba que la carga publica un único resumen y que los carritos diferidos no alertan."""
+    repo = InventoryRepository()
+    repo.save_product(Product(barcode="1", name="Pan", quantity=5, reorder_point=3))
+    repo.save_product(Product(barcode="2", name="Leche", quantity=1, reorder_point=2))
+    repo.save_product(Product(barcode="3", name="Café", quantity=0, reorder_point=1))
+    service = InventoryService(InventoryRepository(lazy_history=True), autoload=False)
+    events = []
+    service.subscribe(events.append)
+    for page in InventoryRepository(lazy_history=True).iter_product_pages(page_size=1):
+        service.extend_catalog(page.products)
+    assert [e.kind for e in events] == ["load"] * 3
+    service.finish_loading()
+    assert [(e.kind, e.barcodes) for e in events][-1] == ("low_stock", ["2", "3"])
+    events.clear()
+    service.reload()
+    assert [(e.kind, e.barcodes) for e in events] == [("reload", ["1", "2", "3"]), ("low_stock", ["2", "3"])]
+
+    events.clear()
+    sales = SaleService(service, deferred_stock=True)
+    sales.start_sale("ana")
+    sales.add_item("1", 2, 1.0)
+    assert "low_stock" not in [e.kind for e in events]
+    assert "1" not in service.low_stock
+    sales.finalize_sale()
+    assert [(e.kind, e.barcodes) for e in events][-1] == ("low_stock", ["1"])
+
+def test_price_as_of_never_edited() -> None:
+    """Prueba que un producto nunca editado tiene precio vigente desde su alta."""
+    service = InventoryService()
+    before = datetime.now()
+    service.add_product(Product(barcode="1", name="Pan", retail_price=2.0, wholesale_price=1.5))
+    assert service.get_price_at("1", datetime.now()).retail_price == 2.0
+    assert InventoryService().get_price_at("1", datetime.now()).wholesale_price == 1.5
+    assert service.repository.get_price_at("1", before - timedelta(days=1)) is None
+
+def test_price_as_of() -> None:
+    """Prueba la consulta de precios vigentes en una fecha, individual y en bloque."""
+    repo = InventoryRepository()
+    repo.save_product(Product(barcode="1", name="A"))
+    repo.save_product(Product(barcode="2", name="B"))
+    for month, price in ((1, 2.0), (3, 3.0), (6, 4.0)):
+        repo.save_price_history(ProductPriceHistory("1", price, price - 0.5, datetime(2024, month, 1)))
+    repo.save_price_history(ProductPriceHistory("2", 9.0, 8.0, datetime(2024, 2, 1)))
+    assert repo.get_price_at("1", datetime(2023, 12, 31)) is None
+    assert repo.get_price_at("1", datetime(2024, 3, 1)).retail_price == 3.0
+    assert repo.get_price_at("1", datetime(2024, 5, 31)).wholesale_price == 2.5
+    lookups = [("1", datetime(2024, 12, 1)), ("2", datetime(2024, 1, 1)), ("1", datetime(2024, 2, 15)), ("3", datetime(2024, 1, 1))]
+    prices = repo.get_prices_at(lookups)
+    assert [p.retail_price if p else None for p in prices] == [4.0, None, 2.0, None]
+    assert prices == [repo.get_price_at(barcode, when) for barcode, when in lookups]
+    service = InventoryService(repo)
+    product = service.get_product_by_barcode("1")
+    assert product.price_at(datetime(2024, 4, 1)).retail_price == 3.0
+    assert service.get_price_at("1", datetime(2024, 7, 1)) == product.price_history[0]